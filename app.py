@@ -1,8 +1,23 @@
+import logging
+import os
+import threading
+
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import numpy as np
+
+from chart_cache import DEFAULT_DPI, ChartCache, render_figure
+from charts import CHART_SPECS, SPECS_BY_ID, SPECS_BY_LABEL, filter_index
+from data_loader import data_fingerprint
+from datasets import DatasetRegistry, DerivedCache, dataset_paths
+from ingest import load_fact_sheets
+from prerender import prerender_all
+from sql_source import SQLSource
+from table_view import DEFAULT_PAGE_SIZE, PAGE_SIZES, TableWindow
+from transforms import selection_key
+from instrumentation import (
+    METRICS, cache_event, current_run, finish_run, profiling_requested, stage, start_run
+)
+
+logger = logging.getLogger("candy.app")
 
 # Cấu hình page
 st.set_page_config(
@@ -12,126 +27,325 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Cấu hình matplotlib
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.style.use('default')  # Sử dụng style mặc định cho tốc độ
+# Bảng fact dạng dòng (CSV/Parquet). Nếu được đặt, c1–c14 được tính từ rollup cube
+# thay vì đọc các sheet đã gộp sẵn trong data.xlsx
+FACT_TABLE = os.environ.get("SALES_FACT_TABLE")
+
+# File SQLite/DuckDB có bảng fact "sales". Nếu được đặt, c1–c14 được tính bằng SQL
+# trực tiếp trên cơ sở dữ liệu và bộ lọc của trang được đẩy xuống câu truy vấn
+DATABASE = os.environ.get("SALES_DATABASE")
+
+# Nhiều bộ dữ liệu cùng schema (vd. mỗi vùng một workbook): "tên=đường_dẫn,..." hoặc
+# một thư mục. Mặc định chỉ có một bộ: SALES_DATABASE nếu có, không thì data.xlsx
+DATASETS = dataset_paths(os.environ.get("SALES_DATASETS"), default=DATABASE or "data.xlsx")
+
+# Trần bộ nhớ (MB) cho dữ liệu đã nạp của mọi bộ dữ liệu; vượt thì bỏ bộ lâu không dùng nhất
+DATASET_CACHE_MB = int(os.environ.get("DATASET_CACHE_MB", "512"))
+
+# Ảnh Matplotlib chỉ được render trước (cho mọi phân tích) khi có session dùng backend ảnh
+# tĩnh, vì mặc định trang vẽ bằng Vega-Lite. Đặt CHART_PRERENDER=0 để tắt hẳn
+PRERENDER = os.environ.get("CHART_PRERENDER", "1") != "0"
+
+# Tương tác = Vega-Lite vẽ và lọc trên trình duyệt; ảnh tĩnh = Matplotlib render trên server
+CHART_BACKENDS = ["Tương tác", "Ảnh tĩnh (Matplotlib)"]
 
-# Cache function để đọc dữ liệu
-@st.cache_data
-def load_data():
-    """Load all data sheets at once and cache them"""
+# Store của mọi bộ dữ liệu dùng chung trong process; mỗi store chỉ nạp lại sheet nào thay đổi
+@st.cache_resource
+def get_registry():
+    """Shared registry of every dataset's sheet store"""
+    return DatasetRegistry(DATASETS, DATASET_CACHE_MB * 1024 * 1024)
+
+def get_data_store(dataset):
+    """Sheet store of one dataset, shared by all sessions"""
+    return get_registry().store(dataset)
+
+# Cache dạng resource: mọi session dùng chung một bản chỉ đọc thay vì nhận bản copy
+@st.cache_resource
+def load_fact_data():
+    """Build all sheets and their fingerprints from the fact table"""
+    data_sheets = load_fact_sheets(FACT_TABLE)
+    return data_sheets, {sheet: data_fingerprint(df) for sheet, df in data_sheets.items()}
+
+def load_data(dataset, sheet):
+    """Load one data sheet of a dataset, refreshing only the sheets changed on disk"""
     try:
-        data_sheets = {}
-        sheet_names = ['c1', 'c2', 'c3', 'c4', 'c5', 'c6', 'c7', 'c8', 'c9', 'c10', 'c11', 'c12', 'c13', 'c14']
-        
-        for sheet in sheet_names:
-            data_sheets[sheet] = pd.read_excel("data.xlsx", sheet_name=sheet)
-        
-        return data_sheets
+        if FACT_TABLE:
+            return load_fact_data()[0][sheet]
+        store = get_data_store(dataset)
+        previous = store.fingerprints
+        changed = store.refresh()
+        if changed:
+            # Chỉ xoá ảnh dựng từ nội dung cũ của các sheet đã đổi, bộ dữ liệu khác không bị ảnh hưởng
+            stale = {previous[name] for name in changed if name in previous}
+            get_chart_cache().invalidate(lambda key: key[1] in stale)
+            get_derived(dataset).invalidate(lambda key: key[2] in stale)
+        loaded = sheet in store.sheets
+        df = store.sheet(sheet)
+        if changed or not loaded:
+            # Chỉ đo lại bộ nhớ khi dữ liệu trong store thay đổi, không phải mỗi lần rerun
+            evict_datasets(get_registry(), get_chart_cache(), dataset)
+        return df
     except Exception as e:
         st.error(f"Lỗi khi đọc dữ liệu: {e}")
         return None
 
-# Cache function cho việc tạo biểu đồ
-@st.cache_data
-def create_yearly_sales_chart(df):
-    """Create yearly sales chart"""
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.lineplot(data=df, x="YEAR", y="SALESAMOUNT", marker="o", ax=ax)
-    ax.set_ylabel("Doanh số")
-    ax.set_xlabel("Năm")
-    ax.set_title("Doanh số theo từng năm")
-    ax.grid(True)
-    plt.tight_layout()
-    return fig
-
-@st.cache_data
-def create_monthly_volume_chart(df_volume, selected_years):
-    """Create monthly volume chart"""
-    filtered_volume = df_volume[df_volume["YEAR"].isin(selected_years)]
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.lineplot(
-        data=filtered_volume,
-        x="MONTH",
-        y="TOTALSALES",
-        hue="YEAR",
-        marker="o",
-        ax=ax
+def evict_datasets(registry, cache, dataset):
+    """Re-measure a dataset that loaded sheets, then drop datasets (and their charts) past the cap"""
+    registry.measure(dataset)
+    evicted = registry.evict()
+    if evicted:
+        dropped = {fp for store in evicted for fp in store.fingerprints.values()}
+        dropped -= registry.fingerprints()
+        cache.invalidate(lambda key: key[1] in dropped)
+
+def load_fingerprints(dataset):
+    """Content hash of every loaded sheet of a dataset"""
+    if FACT_TABLE:
+        return load_fact_data()[1]
+    return get_data_store(dataset).fingerprints
+
+# Cache dùng chung cho mọi session: chỉ giữ ảnh đã render, có LRU và TTL
+@st.cache_resource
+def get_chart_cache():
+    """Shared rendered-chart cache for all sessions"""
+    return ChartCache()
+
+# Mỗi phiên bản dữ liệu chỉ khởi động một lượt nạp nền, và thêm một lượt render trước
+# khi lần đầu có session xem ảnh tĩnh
+@st.cache_resource(max_entries=16)
+def start_background(data_version, prerender, _load_all):
+    """Load the remaining sheets, then optionally pre-render every chart, in a background thread"""
+    thread = threading.Thread(
+        target=load_then_prerender, args=(_load_all, get_chart_cache(), prerender),
+        name="data-prefetch", daemon=True,
     )
-    ax.set_xticks(range(1, 13))
-    ax.set_xlabel("Tháng")
-    ax.set_ylabel("Khối lượng bán")
-    ax.set_title("Khối lượng bán theo từng tháng")
-    ax.legend(title="Năm", bbox_to_anchor=(1.05, 1), loc='upper left')
-    ax.grid(True)
-    plt.tight_layout()
-    return fig
-
-@st.cache_data
-def create_quarterly_chart(df_quarter, selected_years_q):
-    """Create quarterly sales chart"""
-    filtered_quarter = df_quarter[df_quarter["YEAR"].isin(selected_years_q)]
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.lineplot(
-        data=filtered_quarter,
-        x="QUARTER",
-        y="SALESAMOUNT",
-        hue="YEAR",
-        marker="o",
-        ax=ax
+    thread.start()
+    return thread
+
+def load_then_prerender(load_all, cache, prerender):
+    """Body of the background thread; runs outside any script run and never raises"""
+    # Lỗi ở đây chỉ được ghi log: trang vẫn tự nạp / render sheet của nó khi cần
+    try:
+        data_sheets, fingerprints = load_all()
+    except Exception:
+        logger.exception("Background data load failed")
+        return
+    if prerender:
+        try:
+            prerender_all(data_sheets, fingerprints, cache)
+        except Exception:
+            logger.exception("Background pre-render failed")
+
+def start_background_work(dataset, static):
+    """Start (once per data version) the background prefetch, and pre-render for static charts"""
+    prerender = PRERENDER and static
+    if FACT_TABLE:
+        data_sheets, fingerprints = load_fact_data()
+        start_background(
+            tuple(sorted(fingerprints.items())), prerender, lambda: (data_sheets, fingerprints)
+        )
+    else:
+        registry, cache = get_registry(), get_chart_cache()
+        store = registry.store(dataset)
+        start_background(
+            registry.data_version(dataset), prerender,
+            lambda: load_dataset(registry, cache, dataset, store),
+        )
+
+def load_dataset(registry, cache, dataset, store):
+    """Load every sheet of a dataset's store, then apply the memory cap"""
+    # Dùng đúng store lúc bắt đầu: nếu bộ dữ liệu đã bị bỏ ra thì không mở lại nó
+    result = store.load_all()
+    evict_datasets(registry, cache, dataset)
+    return result
+
+# Bảng fact chỉ có một bộ dữ liệu và không bao giờ bị bỏ ra
+@st.cache_resource
+def get_fact_derived():
+    """Derived-object cache of the fact-table data"""
+    return DerivedCache()
+
+def get_derived(dataset):
+    """Frames and indexes built from a dataset's sheets, dropped when the dataset is evicted"""
+    if FACT_TABLE:
+        return get_fact_derived()
+    return get_registry().derived(dataset)
+
+# Kết quả transform dùng chung, không copy: pandas >= 3 luôn copy-on-write nên session nào lỡ sửa
+# frame cũng chỉ sửa trên bản riêng của nó
+def get_transformed(dataset, chart_id, fingerprint, df):
+    """Run a chart's transform once per (chart, sheet content)"""
+    def build():
+        # Chỉ chạy khi cache miss
+        cache_event("transform", hit=False)
+        return SPECS_BY_ID[chart_id].transform(df)
+    return get_derived(dataset).get_or_build(("transform", chart_id, fingerprint), build)
+
+# Index chỉ đọc nên dùng chung một bản cho mọi session, không copy mỗi lần hit
+def get_filter_index(dataset, chart_id, fingerprint, data):
+    """Filter index of a chart's transformed frame, built once per data version"""
+    return get_derived(dataset).get_or_build(
+        ("filter", chart_id, fingerprint),
+        lambda: filter_index(data, SPECS_BY_ID[chart_id].filter),
     )
-    ax.set_xticks([1, 2, 3, 4])
-    ax.set_xlabel("Quý")
-    ax.set_ylabel("Doanh số")
-    ax.set_title("Doanh số theo từng quý")
-    ax.legend(title="Năm", bbox_to_anchor=(1.05, 1), loc='upper left')
-    ax.grid(True)
-    plt.tight_layout()
-    return fig
-
-@st.cache_data
-def create_growth_chart(df):
-    """Create growth percentage chart"""
-    df_copy = df.copy()
-    df_copy["YEAR_LABEL"] = df_copy["YEAR1"].astype(str) + "-" + df_copy["YEAR2"].astype(str)
-    colors = df_copy["GROWTHPERCENT"].apply(lambda x: "green" if x >= 0 else "red")
+
+def select_rows(spec, dataset, index, selection):
+    """Rows of an analysis for the selected filter values"""
+    store = None if FACT_TABLE else get_data_store(dataset)
+    if isinstance(store, SQLSource) and len(selection) < len(index.options):
+        # Bộ lọc được đẩy xuống mệnh đề WHERE; kết quả được cache theo (câu lệnh, tham số)
+        raw = store.sheet(spec.sheet, {spec.filter.column: selection})
+        return spec.transform(raw) if spec.transform else raw
+    return index.select(selection)
+
+def transform_data(spec, dataset, fingerprint, raw):
+    """Cached transform of one analysis, recording the cache outcome"""
+    run = current_run()
+    events_before = len(run.cache_events) if run else 0
+    with stage("transform", spec.chart_id):
+        data = get_transformed(dataset, spec.chart_id, fingerprint, raw)
+    if run and len(run.cache_events) == events_before:
+        cache_event("transform", hit=True)
+    return data
+
+def show_chart(chart_id, fingerprint, render, filters=()):
+    """Render a chart through the shared image cache and display it"""
+    key = ChartCache.make_key(chart_id, fingerprint, filters, ("png", DEFAULT_DPI))
+    cache = get_chart_cache()
+    payload = cache.get(key)
+    cache_event("chart_image", hit=payload is not None)
+    if payload is None:
+        with stage("render", chart_id):
+            fig = render()
+        with stage("serialize", chart_id):
+            payload = render_figure(fig)
+        cache.put(key, payload)
+    with stage("display", chart_id):
+        st.image(payload, width="stretch")
+
+def show_analysis(spec, dataset, raw, interactive=False):
+    """Transform, filter, render and tabulate one analysis from its spec"""
+    fingerprint = load_fingerprints(dataset).get(spec.sheet)
+    data = transform_data(spec, dataset, fingerprint, raw) if spec.transform else raw
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.bar(df_copy["YEAR_LABEL"], df_copy["GROWTHPERCENT"], color=colors)
-    ax.axhline(0, color="black", linewidth=1)
+    filtered = data
+    selection = ()
+    if interactive and spec.vega is not None:
+        # Lọc diễn ra trên trình duyệt (legend), server chỉ gửi spec và các cột cần thiết
+        with stage("vega", spec.chart_id):
+            frame, vega_spec = spec.vega(data)
+        with stage("display", spec.chart_id):
+            st.vega_lite_chart(frame, vega_spec, width="stretch")
+        if spec.filter is not None:
+            st.caption("Bấm vào chú thích để lọc (giữ Shift để chọn nhiều).")
+    else:
+        if spec.filter is not None:
+            index = get_filter_index(dataset, spec.chart_id, fingerprint, data)
+            selection = st.multiselect(spec.filter.label, index.options, default=index.options)
+            if selection:
+                # Cùng một frame đã lọc dùng cho cả biểu đồ và bảng dữ liệu
+                with stage("filter", spec.chart_id):
+                    filtered = select_rows(spec, dataset, index, selection)
+        
+        if spec.filter is None or selection:
+            show_chart(
+                spec.chart_id, fingerprint, lambda: spec.draw(filtered),
+                filters=selection_key(selection)
+            )
     
-    for bar, value in zip(bars, df_copy["GROWTHPERCENT"]):
-        ax.text(
-            bar.get_x() + bar.get_width() / 2,
-            bar.get_height() + (0.3 if value >= 0 else -0.8),
-            f"{value:.2f}%",
-            ha='center',
-            va='bottom' if value >= 0 else 'top',
-            fontsize=10,
-            color='black'
-        )
+    frames = {"raw": raw, "data": data, "filtered": filtered}
+    for number, table in enumerate(spec.tables):
+        show_table(spec, dataset, number, table, frames[table.source], fingerprint, selection)
+
+# Cửa sổ bảng dùng chung giữa các session; nhớ thứ tự sắp xếp và kết quả tìm kiếm
+def get_table_window(dataset, chart_id, number, fingerprint, filters, frame, columns):
+    """Paged view over one table of an analysis for a data version and selection"""
+    return get_derived(dataset).get_or_build(
+        ("table", chart_id, fingerprint, number, filters, columns),
+        lambda: TableWindow(frame, columns),
+    )
+
+def show_table(spec, dataset, number, table, frame, fingerprint, selection):
+    """Paged raw-data expander; nothing is computed or sent until it is opened"""
+    key = f"table-{spec.chart_id}-{number}"
+    expander = st.expander(table.title, key=key, on_change="rerun")
+    if not expander.open:
+        return
     
-    ax.set_title("Tăng trưởng doanh số theo năm (%)")
-    ax.set_ylabel("Tăng trưởng (%)")
-    ax.set_xlabel("Giai đoạn")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    return fig
+    with expander, stage("table", spec.chart_id):
+        filters = selection_key(selection) if table.source == "filtered" else ()
+        window = get_table_window(dataset, spec.chart_id, number, fingerprint, filters, frame, table.columns)
+        search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+        query = search_col.text_input("Tìm kiếm", key=f"{key}-query")
+        sort_by = sort_col.selectbox(
+            "Sắp xếp theo", list(window.frame.columns), index=None, key=f"{key}-sort"
+        )
+        ascending = order_col.radio("Thứ tự", ["Tăng", "Giảm"], key=f"{key}-order") == "Tăng"
+        size = size_col.selectbox(
+            "Số dòng", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}-size"
+        )
+        
+        total = window.count(query)
+        pages = max(1, -(-total // size))
+        page_key = f"{key}-page"
+        if st.session_state.get(page_key, 1) > pages:
+            # Tìm kiếm / đổi số dòng làm số trang giảm: quay về trang cuối còn hợp lệ
+            st.session_state[page_key] = pages
+        page = st.number_input(f"Trang (/{pages})", min_value=1, max_value=pages, key=page_key)
+        rows = window.page(page - 1, size, sort_by, ascending, query)
+        st.dataframe(rows)
+        first = (page - 1) * size
+        st.caption(f"Dòng {min(first + 1, total):,}–{first + len(rows):,} / {total:,}")
+
+def show_diagnostics(run):
+    """Sidebar panel with this rerun's stage timings and process-wide metrics"""
+    with st.sidebar.expander("🛠 Chẩn đoán hiệu năng"):
+        st.caption(f"Lần chạy này: {run.total_ms:.1f} ms")
+        st.dataframe(
+            [{"stage": name, "chart": chart_id, "ms": round(ms, 2)} for name, chart_id, ms in run.stages],
+            hide_index=True,
+        )
+        for cache in ("chart_image", "transform"):
+            rate = METRICS.hit_rate(cache)
+            if rate is not None:
+                st.caption(f"Tỉ lệ hit cache {cache}: {rate:.0%}")
+        st.caption("Tất cả session (độ trễ theo bucket, ms):")
+        st.dataframe(METRICS.summary_rows(), hide_index=True)
+        st.download_button(
+            "Tải số liệu Prometheus", METRICS.prometheus_text(),
+            file_name="metrics.prom", mime="text/plain"
+        )
 
 # Main app
 def main():
+    run = start_run(profiling_requested(st.query_params))
+    selected_analysis = None
+    try:
+        selected_analysis = show_page()
+    finally:
+        if run.enabled:
+            show_diagnostics(run)
+        finish_run(run, analysis=selected_analysis)
+
+def select_dataset():
+    """Dataset picked in the sidebar, starting from (and kept in) the ?dataset= URL parameter"""
+    names = list(DATASETS)
+    if len(names) == 1:
+        return names[0]
+    if "dataset" not in st.session_state:
+        wanted = st.query_params.get("dataset")
+        if wanted is not None and wanted not in names:
+            st.sidebar.warning(f"Không có bộ dữ liệu {wanted}, dùng {names[0]}.")
+        st.session_state["dataset"] = wanted if wanted in names else names[0]
+    dataset = st.sidebar.selectbox("Bộ dữ liệu:", names, key="dataset")
+    # Giữ lựa chọn trên URL để có thể chia sẻ / đánh dấu trang của từng vùng
+    st.query_params["dataset"] = dataset
+    return dataset
+
+def show_page():
+    """Render the page; returns the selected analysis label"""
     st.title("🍬 CANDY DATASETS ANALYSIS")
     
-    # Load data
-    with st.spinner("Đang tải dữ liệu..."):
-        data_sheets = load_data()
-    
-    if data_sheets is None:
-        st.error("Không thể tải dữ liệu. Vui lòng kiểm tra file data.xlsx")
-        return
-    
     # Introduction
     st.write("""
     Dự án này tập trung vào việc phân tích dữ liệu bán hàng của các sản phẩm tiêu dùng nhanh từ nhiều nhà sản xuất 
@@ -140,428 +354,32 @@ def main():
     
     # Sidebar navigation
     st.sidebar.title("📊 Navigation")
-    analysis_options = [
-        "Doanh số theo năm",
-        "Khối lượng bán theo tháng", 
-        "Doanh số theo quý",
-        "Tăng trưởng doanh số",
-        "Min/Max doanh số",
-        "Top sản phẩm tăng trưởng",
-        "Doanh số theo kênh phân phối",
-        "Tăng trưởng theo kênh",
-        "Top nhà sản xuất",
-        "Doanh số theo nhà sản xuất",
-        "Thương hiệu theo kênh",
-        "Doanh số theo loại sản phẩm",
-        "Top thương hiệu theo category",
-        "Top sản phẩm theo nhà sản xuất"
-    ]
+    analysis_options = [spec.label for spec in CHART_SPECS]
     
+    dataset = None if FACT_TABLE else select_dataset()
     selected_analysis = st.sidebar.selectbox("Chọn phân tích:", analysis_options)
+    chart_backend = st.sidebar.radio("Kiểu biểu đồ:", CHART_BACKENDS)
     
-    # Display selected analysis
-    if selected_analysis == "Doanh số theo năm":
-        st.header("📈 Doanh số theo từng năm")
-        fig = create_yearly_sales_chart(data_sheets['c1'])
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(data_sheets['c1'])
-    
-    elif selected_analysis == "Khối lượng bán theo tháng":
-        st.header("📦 Khối lượng bán theo tháng trong từng năm")
-        
-        years = sorted(data_sheets['c2']["YEAR"].unique())
-        selected_years = st.multiselect("Chọn năm:", years, default=years)
-        
-        if selected_years:
-            fig = create_monthly_volume_chart(data_sheets['c2'], selected_years)
-            st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            filtered_data = data_sheets['c2'][data_sheets['c2']["YEAR"].isin(selected_years)]
-            st.dataframe(filtered_data)
-    
-    elif selected_analysis == "Doanh số theo quý":
-        st.header("📆 Doanh số theo từng quý trong năm")
-        
-        years_q = sorted(data_sheets['c3']["YEAR"].unique())
-        selected_years_q = st.multiselect("Chọn năm:", years_q, default=years_q)
-        
-        if selected_years_q:
-            fig = create_quarterly_chart(data_sheets['c3'], selected_years_q)
-            st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            filtered_data = data_sheets['c3'][data_sheets['c3']["YEAR"].isin(selected_years_q)]
-            st.dataframe(filtered_data)
-    
-    elif selected_analysis == "Tăng trưởng doanh số":
-        st.header("📊 Biểu đồ tăng trưởng doanh số theo năm (%)")
-        fig = create_growth_chart(data_sheets['c4'])
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(data_sheets['c4'])
-    
-    elif selected_analysis == "Min/Max doanh số":
-        st.header("📊 Doanh số cao nhất và thấp nhất theo tháng trong từng năm")
-        
-        df = data_sheets['c5']
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        bar_width = 0.35
-        x = range(len(df))
-        
-        bars1 = ax.bar([i - bar_width / 2 for i in x], df['MAXSALESAMOUNT'], 
-                      width=bar_width, color='orange', label='MAXSALESAMOUNT')
-        bars2 = ax.bar([i + bar_width / 2 for i in x], df['MINSALESAMOUNT'], 
-                      width=bar_width, color='yellow', label='MINSALESAMOUNT')
-        
-        for i, (bar1, bar2) in enumerate(zip(bars1, bars2)):
-            ax.text(bar1.get_x() + bar1.get_width() / 2, bar1.get_height() + 50000,
-                   f"Tháng {df.loc[i, 'MAXMONTH']}", ha='center', va='bottom', fontsize=9)
-            ax.text(bar2.get_x() + bar2.get_width() / 2, bar2.get_height() + 50000,
-                   f"Tháng {df.loc[i, 'MINMONTH']}", ha='center', va='bottom', fontsize=9)
-        
-        ax.set_xticks(x)
-        ax.set_xticklabels(df['YEAR'])
-        ax.set_ylabel("Sales Amount")
-        ax.set_title("MAX và MIN SALES AMOUNT theo năm và tháng")
-        ax.legend()
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
-    
-    elif selected_analysis == "Top sản phẩm tăng trưởng":
-        st.header("📈 Top sản phẩm có tăng trưởng cao nhất từng năm")
-        
-        df = data_sheets['c6'].copy()
-        df['YEAR_LABEL'] = df['YEAR1'].astype(str) + '-' + df['YEAR2'].astype(str)
-        
-        fig, ax = plt.subplots(figsize=(14, 8))
-        bars = ax.bar(df['YEAR_LABEL'], df['GROWTHSALES'], color='mediumseagreen')
-        
-        # Thêm tên sản phẩm lên trên mỗi cột
-        for i, (bar, row) in enumerate(zip(bars, df.itertuples())):
-            # Rút ngắn tên sản phẩm nếu quá dài
-            product_name = row.PRODUCTNAME if hasattr(row, 'PRODUCTNAME') else f"Product {i+1}"
-            if len(product_name) > 15:
-                product_name = product_name[:12] + "..."
-            
-            ax.text(
-                bar.get_x() + bar.get_width() / 2,
-                bar.get_height() + max(df['GROWTHSALES']) * 0.02,  # Offset 2% từ đỉnh cột
-                product_name,
-                rotation=90,
-                ha="left",
-                va="bottom",
-                fontsize=9,
-                color="black",
-                fontweight='bold'
-            )
-        
-        # Tăng margin top để có chỗ cho text
-        ax.set_ylim(0, max(df['GROWTHSALES']) * 1.3)
-        
-        ax.set_ylabel("Tăng trưởng (%)")
-        ax.set_xlabel("Giai đoạn")
-        ax.set_title("Top sản phẩm có tăng trưởng cao nhất từng năm")
-        plt.xticks(rotation=15)
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
-    
-    elif selected_analysis == "Doanh số theo kênh phân phối":
-        st.header("🏬 Doanh số và khối lượng bán theo Distribution Channel")
-        
-        df = data_sheets['c7']
-        fig, ax = plt.subplots(figsize=(10, 5))
-        
-        x = np.arange(len(df['DISTRIBUTION_CHANNEL']))
-        width = 0.35
-        
-        ax.bar(x - width/2, df['TOTALSALES'], width, 
-               label='Tổng sản phẩm (TOTALSALES)', color='royalblue')
-        ax.bar(x + width/2, df['SALESAMOUNT'], width, 
-               label='Doanh số (SALESAMOUNT)', color='darkorange')
-        
-        ax.set_xlabel("Kênh phân phối")
-        ax.set_ylabel("Giá trị")
-        ax.set_title("Doanh số và khối lượng bán theo từng Distribution Channel")
-        ax.set_xticks(x)
-        ax.set_xticklabels(df['DISTRIBUTION_CHANNEL'], rotation=15, ha='right')
-        ax.legend()
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
-    
-    elif selected_analysis == "Tăng trưởng theo kênh":
-        st.header("📈 Tăng trưởng doanh số theo từng kênh phân phối")
-        
-        df = data_sheets['c8'].copy()
-        df['YEAR_LABEL'] = df['YEAR_1'].astype(str) + '–' + df['YEAR_2'].astype(str)
-        
-        channels = df['DISTRIBUTION_CHANNEL'].unique()
-        selected_channels = st.multiselect("Chọn kênh phân phối:", channels, default=channels)
-        
-        if selected_channels:
-            filtered_df = df[df['DISTRIBUTION_CHANNEL'].isin(selected_channels)]
-            
-            fig, ax = plt.subplots(figsize=(16, 8))
-            sns.lineplot(
-                data=filtered_df,
-                x="YEAR_LABEL",
-                y="GROWTHPERCENT",
-                hue="DISTRIBUTION_CHANNEL",
-                marker="o",
-                ax=ax
-            )
-            
-            ax.axhline(0, color='gray', linestyle='--')
-            ax.set_title("Tăng trưởng doanh số theo từng kênh phân phối qua các năm")
-            ax.set_ylabel("Tăng trưởng (%)")
-            ax.set_xlabel("Năm")
-            plt.xticks(rotation=45)
-            ax.legend(title="Kênh phân phối", bbox_to_anchor=(1.05, 1), loc='upper left')
-            plt.tight_layout()
-            st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
-    
-    elif selected_analysis == "Top nhà sản xuất":
-        st.header("🏆 Nhà sản xuất có doanh số cao nhất từng năm")
-        
-        df = data_sheets['c9']
-        top_manu_each_year = (
-            df.groupby(['YEAR', 'MANUFACTURER'])['SALESAMOUNT']
-            .sum()
-            .reset_index()
-            .sort_values(['YEAR', 'SALESAMOUNT'], ascending=[True, False])
-            .drop_duplicates(subset='YEAR')
-        )
-        
-        fig, ax = plt.subplots(figsize=(10, 5))
-        sns.barplot(data=top_manu_each_year, x='YEAR', y='SALESAMOUNT', 
-                   hue='MANUFACTURER', dodge=False, palette='Set2', ax=ax)
-        
-        ax.set_title("Nhà sản xuất có doanh số cao nhất từng năm")
-        ax.set_ylabel("Doanh số")
-        ax.set_xlabel("Năm")
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(top_manu_each_year)
-    
-    elif selected_analysis == "Doanh số theo nhà sản xuất":
-        st.header("📈 Doanh số theo từng Nhà sản xuất theo từng năm")
-        
-        df = data_sheets['c10']
-        manufacturers = df['MANUFACTURER'].dropna().unique()
-        selected_manufacturers = st.multiselect(
-            "Chọn nhà sản xuất:", manufacturers, default=manufacturers
-        )
-        
-        if selected_manufacturers:
-            filtered_df = df[df['MANUFACTURER'].isin(selected_manufacturers)]
-            
-            fig, ax = plt.subplots(figsize=(12, 6))
-            sns.lineplot(data=filtered_df, x="YEAR", y="SALESAMOUNT", 
-                        hue="MANUFACTURER", marker="o", ax=ax)
-            
-            ax.set_title("Sales Amount by Manufacturer (2018–2024)")
-            ax.set_xlabel("Year")
-            ax.set_ylabel("Sales Amount")
-            ax.legend(title="Manufacturer", bbox_to_anchor=(1.05, 1), loc='upper left')
-            plt.tight_layout()
-            st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            filtered_data = df[df['MANUFACTURER'].isin(selected_manufacturers)] if selected_manufacturers else df
-            st.dataframe(filtered_data)
-    
-    elif selected_analysis == "Thương hiệu theo kênh":
-        st.header("🏅 Thương hiệu có hiệu suất doanh số trung bình mỗi sản phẩm tốt nhất trong từng kênh phân phối")
-        
-        df = data_sheets['c11']
-        fig, ax = plt.subplots(figsize=(12, 6))
-        sns.barplot(data=df, x="DISTRIBUTION_CHANNEL", y="AVG_SALES_PER_PRODUCT", 
-                   hue="BRAND", dodge=False, palette="pastel", ax=ax)
-        
-        for i, row in df.iterrows():
-            ax.text(i, row["AVG_SALES_PER_PRODUCT"] + 5000, row["BRAND"], 
-                   ha="center", fontsize=9, fontweight='bold')
-        
-        ax.set_title("Thương hiệu có hiệu suất doanh số trung bình mỗi sản phẩm tốt nhất trong từng kênh phân phối")
-        ax.set_ylabel("Average Sales per Product")
-        ax.set_xlabel("Distribution Channel")
-        plt.xticks(rotation=30, ha='right')
-        ax.legend().remove()  # Remove legend since we have text labels
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
-    
-    elif selected_analysis == "Doanh số theo loại sản phẩm":
-        st.header("📊 Doanh số theo từng Loại Sản phẩm (Product Category) từ 2018 đến 2024")
-        
-        df = data_sheets['c12']
-        fig, ax = plt.subplots(figsize=(12, 6))
-        sns.lineplot(data=df, x="YEAR", y="SALESAMOUNT", hue="CATEGORY", marker="o", ax=ax)
-        
-        ax.set_title("Sales Amount by Product Category (2018–2024)")
-        ax.set_xlabel("Year")
-        ax.set_ylabel("Sales Amount")
-        ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
+    spec = SPECS_BY_LABEL.get(selected_analysis)
+    if spec is None:
+        st.info("Chọn một phân tích từ sidebar để xem kết quả.")
+        return selected_analysis
+    st.header(spec.header)
     
-    elif selected_analysis == "Top thương hiệu theo category":
-        st.header("🏆 Thương hiệu có doanh số cao nhất trong từng Category theo từng năm")
-        
-        df = data_sheets['c13']
-        fig, ax = plt.subplots(figsize=(16, 10))
-        
-        chart = sns.barplot(data=df, x="YEAR", y="TOTALSALES", hue="CATEGORY", palette="Set2", ax=ax)
-        
-        # Thêm tên thương hiệu lên trên mỗi cột
-        # Lấy vị trí các cột từ matplotlib patches
-        bars = ax.patches
-        
-        # Tạo dictionary để mapping vị trí cột với dữ liệu
-        bar_data = []
-        for i, (_, row) in enumerate(df.iterrows()):
-            bar_data.append({
-                'x': bars[i].get_x() + bars[i].get_width() / 2,
-                'y': bars[i].get_height(),
-                'brand': row['BRAND']
-            })
-        
-        # Hiển thị tên thương hiệu trên mỗi cột
-        for bar_info in bar_data:
-            # Rút ngắn tên thương hiệu nếu quá dài
-            brand_name = bar_info['brand']
-            if len(brand_name) > 12:
-                brand_name = brand_name[:9] + "..."
-            
-            ax.text(
-                bar_info['x'], 
-                bar_info['y'] + max(df['TOTALSALES']) * 0.01,  # Offset 1% từ đỉnh cột
-                brand_name, 
-                rotation=90, 
-                ha="left", 
-                va="bottom",
-                fontsize=9, 
-                color="black",
-                fontweight='bold'
-            )
-        
-        # Tăng margin top để có chỗ cho text
-        ax.set_ylim(0, max(df['TOTALSALES']) * 1.25)
-        
-        ax.set_title("Top Selling Brand per Category per Year", fontsize=16)
-        ax.set_ylabel("Total Sales")
-        ax.set_xlabel("Year")
-        ax.set_xticks(range(len(df["YEAR"].unique())))
-        ax.set_xticklabels(sorted(df["YEAR"].unique()))
-        ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
+    # Chỉ chờ sheet của phân tích đang xem; tiêu đề, sidebar và header đã được gửi đi
+    with st.spinner("Đang tải dữ liệu..."), stage("load", spec.chart_id):
+        raw = load_data(dataset, spec.sheet)
     
-    elif selected_analysis == "Top sản phẩm theo nhà sản xuất":
-        st.header("🏆 Sản phẩm có doanh số cao nhất trong từng Manufacturer")
-        
-        df = data_sheets['c14']
-        
-        # Tính tổng doanh số theo năm và nhà sản xuất
-        total_sales = df.groupby(["YEAR", "MANUFACTURER"])["SALESAMOUNT"].sum().reset_index()
-        
-        # Tìm sản phẩm bán chạy nhất cho mỗi nhà sản xuất và năm
-        top_products = df.groupby(["YEAR", "MANUFACTURER"]).apply(
-            lambda x: x.loc[x["SALESAMOUNT"].idxmax()]
-        ).reset_index(drop=True)
-        
-        # Gộp dữ liệu tổng doanh số với tên sản phẩm bán chạy
-        total_sales = total_sales.merge(
-            top_products[["YEAR", "MANUFACTURER", "PRODUCTNAME"]],
-            on=["YEAR", "MANUFACTURER"]
-        )
-        
-        fig, ax = plt.subplots(figsize=(18, 10))
-        chart = sns.barplot(
-            data=total_sales,
-            x="YEAR",
-            y="SALESAMOUNT",
-            hue="MANUFACTURER",
-            ax=ax
-        )
-        
-        # Thêm tên sản phẩm lên trên mỗi cột
-        # Lấy vị trí các cột từ matplotlib patches
-        bars = ax.patches
-        
-        # Tạo dictionary để mapping vị trí cột với dữ liệu
-        bar_data = []
-        for i, (_, row) in enumerate(total_sales.iterrows()):
-            bar_data.append({
-                'x': bars[i].get_x() + bars[i].get_width() / 2,
-                'y': bars[i].get_height(),
-                'product': row['PRODUCTNAME']
-            })
-        
-        # Hiển thị tên sản phẩm trên mỗi cột
-        for bar_info in bar_data:
-            # Rút ngắn tên sản phẩm nếu quá dài
-            product_name = bar_info['product']
-            if len(product_name) > 15:
-                product_name = product_name[:12] + "..."
-            
-            ax.text(
-                bar_info['x'], 
-                bar_info['y'] + max(total_sales['SALESAMOUNT']) * 0.01,  # Offset 1% từ đỉnh cột
-                product_name, 
-                rotation=90, 
-                ha="left", 
-                va="bottom",
-                fontsize=8, 
-                color="black",
-                fontweight='bold'
-            )
-        
-        # Tăng margin top để có chỗ cho text
-        ax.set_ylim(0, max(total_sales['SALESAMOUNT']) * 1.3)
-        
-        plt.title("Doanh số theo năm và nhà sản xuất (với tên sản phẩm bán chạy nhất)", fontsize=16)
-        plt.xlabel("Năm", fontsize=12)
-        plt.ylabel("Tổng doanh số", fontsize=12)
-        plt.legend(title="Nhà sản xuất", bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        st.pyplot(fig)
-        
-        # Show detailed data with product names
-        with st.expander("📄 Xem dữ liệu chi tiết (bao gồm tên sản phẩm bán chạy)"):
-            st.dataframe(total_sales[['YEAR', 'MANUFACTURER', 'PRODUCTNAME', 'SALESAMOUNT']])
-        
-        with st.expander("📄 Xem dữ liệu gốc"):
-            st.dataframe(df)
+    if raw is None:
+        source = FACT_TABLE or DATASETS[dataset]
+        st.error(f"Không thể tải dữ liệu. Vui lòng kiểm tra file {source}")
+        return selected_analysis
     
-    else:
-        st.info("Chọn một phân tích từ sidebar để xem kết quả.")
+    interactive = chart_backend == CHART_BACKENDS[0]
+    show_analysis(spec, dataset, raw, interactive=interactive)
+    # Các sheet còn lại được nạp (và ảnh tĩnh được render trước) sau khi trang đã vẽ xong
+    start_background_work(dataset, static=not interactive)
+    return selected_analysis
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""Benchmark headless cho toàn bộ 14 phân tích, không cần chạy Streamlit.
+
+Đo thời gian nạp dữ liệu (cold = parse xlsx + ghi cache Arrow, warm = đọc từ
+cache), transform, lọc, render Matplotlib (kể cả encode PNG) và dựng spec
+Vega-Lite cho từng phân tích, trên dữ liệu gốc và dữ liệu giả lớn hơn N lần.
+``--threads N`` đo thêm việc render đồng thời từ N thread (mô phỏng nhiều
+session) và kiểm tra ảnh giống hệt khi render tuần tự. Kết quả là JSON để so
+sánh giữa các lần chạy::
+
+    python bench.py --scales 1,10,100 --output bench.json
+    python bench.py --scales 1,10,100 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from chart_cache import render_figure  # noqa: E402
+from charts import CHART_SPECS, LIVE_FIGURES, filter_index  # noqa: E402
+from data_loader import cache_dir_for, load_workbook  # noqa: E402
+from ingest import peak_rss_mb  # noqa: E402
+from synthetic import synthetic_sheets, write_workbook  # noqa: E402
+
+STAGES = ("transform", "filter", "render", "vega")
+# Chênh lệch tuyệt đối nhỏ hơn ngưỡng này coi như nhiễu đo
+MIN_REGRESSION_MS = 1.0
+
+# Ở quy mô lớn tight_layout thường không đủ chỗ; cảnh báo này không ảnh hưởng kết quả
+warnings.filterwarnings("ignore", message="Tight layout not applied")
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds (also used by loadtest.py)"""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def live_figures():
+    """Number of Figure objects still alive after a full garbage collection"""
+    # Figure và artist tham chiếu vòng lẫn nhau nên chỉ được giải phóng khi GC chạy; lượt
+    # đầu còn chạy callback của weakref / finalizer, nên gom tới khi không còn gì để gom
+    for _ in range(3):
+        if not gc.collect():
+            break
+    return len(LIVE_FIGURES)
+
+
+def timed(fn, repeat, setup=None):
+    """Run fn repeat times; return (samples in seconds, last result)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return samples, result
+
+
+def bench_load(path, repeat):
+    """Time cold (parse + write cache) and warm (memory-mapped cache) loads"""
+    cache_dir = cache_dir_for(path)
+
+    def drop_cache():
+        for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+            os.remove(os.path.join(cache_dir, name))
+
+    cold, sheets = timed(lambda: load_workbook(path), repeat, setup=drop_cache)
+    warm, _ = timed(lambda: load_workbook(path), repeat)
+    return sheets, {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+def _select_all(data, filter_spec):
+    # Build index + chọn mọi giá trị, giống lần rerun đầu tiên trên trang
+    index = filter_index(data, filter_spec)
+    return index.select(index.options)
+
+
+def _pipeline(spec, raw):
+    data = spec.transform(raw) if spec.transform else raw
+    filtered = _select_all(data, spec.filter) if spec.filter is not None else data
+    return data, filtered
+
+
+def bench_analysis(spec, sheets, repeat):
+    """Time every stage of one analysis and measure its allocation high-water"""
+    raw = sheets[spec.sheet]
+    figures_before = live_figures()
+
+    transform_samples, data = timed(
+        lambda: spec.transform(raw) if spec.transform else raw, repeat
+    )
+    if spec.filter is not None:
+        filter_samples, filtered = timed(lambda: _select_all(data, spec.filter), repeat)
+    else:
+        filter_samples, filtered = [0.0], data
+    render_samples, png = timed(lambda: render_figure(spec.draw(filtered)), repeat)
+    vega_samples, _ = timed(lambda: spec.vega(data), repeat)
+
+    # Đo bộ nhớ ở một lượt riêng để tracemalloc không làm lệch thời gian
+    tracemalloc.start()
+    _, filtered = _pipeline(spec, raw)
+    render_figure(spec.draw(filtered))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": len(raw),
+        "transform": summarize(transform_samples),
+        "filter": summarize(filter_samples),
+        "render": summarize(render_samples),
+        "vega": summarize(vega_samples),
+        "png_bytes": len(png),
+        "peak_alloc_mb": peak / (1024 * 1024),
+        "figures_leaked": live_figures() - figures_before,
+    }
+
+
+def bench_threads(specs, sheets, threads, rounds=2):
+    """Render every analysis ``rounds`` times from a thread pool; check output matches serial"""
+    expected = {}
+    for spec in specs:
+        _, filtered = _pipeline(spec, sheets[spec.sheet])
+        expected[spec.chart_id] = (filtered, render_figure(spec.draw(filtered)))
+
+    def render(spec):
+        filtered, png = expected[spec.chart_id]
+        return render_figure(spec.draw(filtered)) == png
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        matches = list(pool.map(render, list(specs) * rounds))
+    elapsed = time.perf_counter() - started
+    return {
+        "threads": threads,
+        "renders": len(matches),
+        "wall_ms": elapsed * 1000,
+        "renders_per_sec": len(matches) / elapsed,
+        "mismatched": matches.count(False),
+    }
+
+
+def run(source, scales, repeat, load_repeat, only=None, threads=0):
+    """Run the whole benchmark; returns a JSON-serializable dict"""
+    base = load_workbook(source)
+    specs = [spec for spec in CHART_SPECS if not only or spec.chart_id in only]
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "matplotlib": matplotlib.__version__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for factor in scales:
+            sheets = base if factor == 1 else synthetic_sheets(base, factor)
+            path = os.path.join(workdir, f"data_x{factor}.xlsx")
+            write_workbook(sheets, path)
+            sheets, load = bench_load(path, load_repeat)
+            entry = {
+                "rows": sum(len(df) for df in sheets.values()),
+                "load": load,
+                "analyses": {spec.chart_id: bench_analysis(spec, sheets, repeat) for spec in specs},
+                "threaded": bench_threads(specs, sheets, threads) if threads else None,
+                "open_figures": live_figures(),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            results["scales"][str(factor)] = entry
+            print(f"x{factor}: {entry['rows']:,} rows, cold load {load['cold']['p50_ms']:.0f} ms, "
+                  f"warm load {load['warm']['p50_ms']:.1f} ms", file=sys.stderr)
+    return results
+
+
+def print_report(results):
+    for factor, entry in results["scales"].items():
+        print(f"\n== x{factor} ({entry['rows']:,} rows, peak RSS {entry['peak_rss_mb'] or 0:.0f} MB, "
+              f"open figures {entry['open_figures']}) ==")
+        print(f"{'analysis':<30}" + "".join(f"{stage + ' p50/p95':>22}" for stage in STAGES)
+              + f"{'alloc MB':>10}")
+        for chart_id, stats in entry["analyses"].items():
+            cells = "".join(
+                f"{stats[stage]['p50_ms']:>10.1f}/{stats[stage]['p95_ms']:<10.1f} " for stage in STAGES
+            )
+            print(f"{chart_id:<30}{cells}{stats['peak_alloc_mb']:>9.1f}")
+        threaded = entry.get("threaded")
+        if threaded:
+            print(f"{threaded['threads']} threads: {threaded['renders']} renders in "
+                  f"{threaded['wall_ms']:.0f} ms ({threaded['renders_per_sec']:.1f}/s), "
+                  f"{threaded['mismatched']} differ from serial output")
+
+
+def regressed(old, new, threshold, min_ms=MIN_REGRESSION_MS):
+    """Whether a latency went from old to new ms by more than threshold and min_ms"""
+    return bool(old) and new / old > 1 + threshold and new - old > min_ms
+
+
+def compare(current, baseline, threshold):
+    """List (scale, analysis, stage, ratio) whose p50 got slower than threshold allows"""
+    regressions = []
+    for factor, entry in current["scales"].items():
+        old_entry = baseline.get("scales", {}).get(factor)
+        if not old_entry:
+            continue
+        for kind in ("cold", "warm"):
+            old, new = old_entry["load"][kind]["p50_ms"], entry["load"][kind]["p50_ms"]
+            if regressed(old, new, threshold):
+                regressions.append((factor, "load", kind, new / old))
+        for chart_id, stats in entry["analyses"].items():
+            old_stats = old_entry["analyses"].get(chart_id)
+            if not old_stats:
+                continue
+            for stage in STAGES:
+                old, new = old_stats[stage]["p50_ms"], stats[stage]["p50_ms"]
+                if regressed(old, new, threshold):
+                    regressions.append((factor, chart_id, stage, new / old))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmark of load/transform/render")
+    parser.add_argument("--source", default="data.xlsx", help="base workbook")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated scale factors")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per stage")
+    parser.add_argument("--load-repeat", type=int, default=3, help="runs per load mode")
+    parser.add_argument("--only", default="", help="comma-separated chart ids")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="also render all analyses concurrently from this many threads")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    scales = [int(value) for value in args.scales.split(",") if value]
+    only = {value for value in args.only.split(",") if value}
+    results = run(args.source, scales, args.repeat, args.load_repeat, only, args.threads)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for factor, name, stage, ratio in regressions:
+            print(f"REGRESSION x{factor} {name}.{stage}: {ratio:.2f}x slower")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Cache ảnh biểu đồ đã render (PNG/SVG bytes) với giới hạn bộ nhớ, LRU và TTL.
+
+Thay vì giữ các đối tượng ``Figure`` sống trong ``st.cache_data`` (mỗi lần hit
+phải pickle/unpickle cả cây figure và figure không bao giờ được đóng), cache
+này chỉ giữ kết quả cuối cùng đã encode. Figure được giải phóng ngay sau khi encode.
+"""
+import io
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 60 * 60
+# Giống cấu hình mặc định của st.pyplot để ảnh hiển thị không đổi
+DEFAULT_DPI = 200
+
+
+_styled = False
+# style.use() đặt lại toàn bộ rcParams: hai session vẽ lần đầu cùng lúc không được
+# để một bên đổi style khi bên kia đang vẽ, nên chỉ một thread áp dụng, các thread
+# khác chờ tới khi xong
+_style_lock = threading.Lock()
+
+
+def apply_style():
+    """Global Matplotlib settings, applied once per process before the first figure"""
+    global _styled
+    if _styled:
+        return
+    with _style_lock:
+        if _styled:
+            return
+        import matplotlib
+        import matplotlib.style
+
+        matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+        matplotlib.style.use('default')  # Sử dụng style mặc định cho tốc độ
+        _styled = True
+
+
+def render_figure(fig, fmt="png", dpi=DEFAULT_DPI):
+    """Encode a figure to bytes and release it"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    finally:
+        # Figure không thuộc pyplot nên không cần plt.close; xoá artist để phá các
+        # vòng tham chiếu và trả bộ nhớ ngay, không phải chờ GC
+        fig.clear()
+    return buffer.getvalue()
+
+
+class ChartCache:
+    """Thread-safe LRU cache of rendered chart bytes with a byte budget and TTL"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(chart_id, fingerprint, filters=(), theme=()):
+        """Build a cache key from the chart id, data, filter selection and theme/size"""
+        return (chart_id, fingerprint, tuple(filters), tuple(theme))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # Không tính vào hits/misses và không đổi thứ tự LRU
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                self.ttl is None or time.monotonic() - entry[0] <= self.ttl
+            )
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            created, payload = entry
+            if self.ttl is not None and time.monotonic() - created > self.ttl:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            # Ảnh lớn hơn cả ngân sách thì không cache
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic(), payload)
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key matches predicate"""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self._drop(key)
+
+    def _drop(self, key):
+        _, payload = self._entries.pop(key)
+        self._size -= len(payload)
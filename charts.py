@@ -0,0 +1,591 @@
+"""Registry các phân tích: mỗi ChartSpec mô tả sheet, transform, bộ lọc và hàm vẽ.
+
+``main()`` trong app.py chỉ tra cứu spec của phân tích được chọn rồi chạy
+pipeline chung (transform -> lọc -> render qua cache ảnh), nên phân tích nào
+cũng được cache và chỉ phân tích đang xem mới được tính toán.
+"""
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+import vega_charts
+from chart_cache import apply_style
+from growth import pair_labels, period_over_period
+from transforms import FilterIndex, plain_frame, top_k_per_group
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Multiselect filter applied to one column of the transformed frame"""
+    column: str
+    label: str
+    sort_options: bool = False
+    dropna: bool = False
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Raw-data expander: which frame to show and which columns"""
+    title: str = "📄 Xem dữ liệu gốc"
+    # "raw" = sheet gốc, "data" = sau transform, "filtered" = sau khi lọc
+    source: str = "raw"
+    columns: Optional[tuple] = None
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    chart_id: str
+    label: str
+    header: str
+    sheet: str
+    render: Callable
+    transform: Optional[Callable] = None
+    filter: Optional[FilterSpec] = None
+    tables: tuple = field(default_factory=lambda: (TableSpec(),))
+    # Hàm sinh spec Vega-Lite cho backend tương tác (xem vega_charts.py)
+    vega: Optional[Callable] = None
+
+    def draw(self, df):
+        """Render df to a Figure, handing categorical columns over as plain strings"""
+        return self.render(plain_frame(df))
+
+
+# ---------------------------------------------------------------------------
+# Transforms
+# ---------------------------------------------------------------------------
+
+def add_year_label(df, first="YEAR1", second="YEAR2", sep="-"):
+    """Return df with a "YEAR1-YEAR2" label column added"""
+    # assign không chép các cột sẵn có (copy-on-write): chỉ cột nhãn là bộ nhớ mới
+    return df.assign(YEAR_LABEL=pair_labels(df[first], df[second], sep))
+
+
+def add_channel_year_label(df):
+    """Return the channel growth sheet with a "YEAR_1–YEAR_2" label added"""
+    return add_year_label(df, "YEAR_1", "YEAR_2", "–")
+
+
+GROWTH_COLUMNS = ("YEAR1", "YEAR2", "SALES_YEAR1", "SALES_YEAR2", "GROWTHSALES", "GROWTHPERCENT")
+
+
+def yearly_growth(df):
+    """Year-over-year growth of the yearly sales sheet (c4 columns plus YEAR_LABEL)"""
+    pairs = period_over_period(df, "SALESAMOUNT")
+    return pd.DataFrame({
+        "YEAR1": pairs["YEAR_1"].to_numpy(),
+        "YEAR2": pairs["YEAR_2"].to_numpy(),
+        "SALES_YEAR1": pairs["SALESAMOUNT_1"].to_numpy(),
+        "SALES_YEAR2": pairs["SALESAMOUNT_2"].to_numpy(),
+        "GROWTHSALES": pairs["GROWTH"].to_numpy(),
+        "GROWTHPERCENT": pairs["GROWTHPERCENT"].to_numpy(),
+        "YEAR_LABEL": pairs["PERIOD_LABEL"].to_numpy(),
+    })
+
+
+def top_manufacturer_each_year(df):
+    """Best-selling manufacturer for every year"""
+    totals = df.groupby(['YEAR', 'MANUFACTURER'], as_index=False)['SALESAMOUNT'].sum()
+    return top_k_per_group(totals, ['YEAR'], 'SALESAMOUNT', k=1)
+
+
+def top_product_by_manufacturer(df):
+    """Yearly sales per manufacturer together with its best-selling product"""
+    # Một lượt: dòng bán chạy nhất của mỗi (năm, nhà sản xuất) kèm tổng doanh số nhóm
+    top = top_k_per_group(df, ["YEAR", "MANUFACTURER"], "SALESAMOUNT", k=1, total="TOTAL")
+    return pd.DataFrame({
+        "YEAR": top["YEAR"].to_numpy(),
+        "MANUFACTURER": top["MANUFACTURER"].to_numpy(),
+        "SALESAMOUNT": top["TOTAL"].to_numpy(),
+        "PRODUCTNAME": top["PRODUCTNAME"].to_numpy(),
+    })
+
+
+def filter_index(df, filter_spec):
+    """Index of a filter's column: cached widget options and fast row selection"""
+    return FilterIndex(
+        df, filter_spec.column, dropna=filter_spec.dropna, sort_options=filter_spec.sort_options
+    )
+
+
+# ---------------------------------------------------------------------------
+# Render functions: nhận frame đã transform/lọc, trả về Figure
+# (seaborn được import trong từng hàm dùng nó để trang không vẽ ảnh tĩnh không
+# phải nạp cả thư viện vẽ)
+# ---------------------------------------------------------------------------
+
+def load_plotting():
+    """Import the whole plotting stack (matplotlib, the Agg canvas and seaborn) now"""
+    import seaborn  # noqa: F401
+
+    new_figure((1, 1))
+
+
+# Mọi Figure chưa được giải phóng (không đi qua pyplot nên plt.get_fignums() không thấy);
+# bench.py đếm tập này để phát hiện figure bị giữ lại
+LIVE_FIGURES = weakref.WeakSet()
+
+
+def new_figure(figsize):
+    """Create a figure with one axes on its own Agg canvas, outside pyplot
+
+    The figure is not registered with pyplot's figure manager, so sessions
+    rendering in parallel threads share no global state and nothing is
+    kept alive once the caller drops the figure.
+    """
+    # Import ở đây để trang chỉ dùng Vega-Lite không phải nạp matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    apply_style()
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    LIVE_FIGURES.add(fig)
+    return fig, fig.add_subplot()
+
+
+def create_yearly_sales_chart(df):
+    """Create yearly sales chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((10, 5))
+    sns.lineplot(data=df, x="YEAR", y="SALESAMOUNT", marker="o", ax=ax)
+    ax.set_ylabel("Doanh số")
+    ax.set_xlabel("Năm")
+    ax.set_title("Doanh số theo từng năm")
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def create_monthly_volume_chart(df):
+    """Create monthly volume chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((12, 6))
+    sns.lineplot(
+        data=df,
+        x="MONTH",
+        y="TOTALSALES",
+        hue="YEAR",
+        marker="o",
+        ax=ax
+    )
+    ax.set_xticks(range(1, 13))
+    ax.set_xlabel("Tháng")
+    ax.set_ylabel("Khối lượng bán")
+    ax.set_title("Khối lượng bán theo từng tháng")
+    ax.legend(title="Năm", bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def create_quarterly_chart(df):
+    """Create quarterly sales chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((12, 6))
+    sns.lineplot(
+        data=df,
+        x="QUARTER",
+        y="SALESAMOUNT",
+        hue="YEAR",
+        marker="o",
+        ax=ax
+    )
+    ax.set_xticks([1, 2, 3, 4])
+    ax.set_xlabel("Quý")
+    ax.set_ylabel("Doanh số")
+    ax.set_title("Doanh số theo từng quý")
+    ax.legend(title="Năm", bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def create_growth_chart(df):
+    """Create growth percentage chart"""
+    colors = np.where(df["GROWTHPERCENT"] >= 0, "green", "red")
+
+    fig, ax = new_figure((10, 6))
+    bars = ax.bar(df["YEAR_LABEL"], df["GROWTHPERCENT"], color=colors)
+    ax.axhline(0, color="black", linewidth=1)
+
+    for bar, value in zip(bars, df["GROWTHPERCENT"]):
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            bar.get_height() + (0.3 if value >= 0 else -0.8),
+            f"{value:.2f}%",
+            ha='center',
+            va='bottom' if value >= 0 else 'top',
+            fontsize=10,
+            color='black'
+        )
+
+    ax.set_title("Tăng trưởng doanh số theo năm (%)")
+    ax.set_ylabel("Tăng trưởng (%)")
+    ax.set_xlabel("Giai đoạn")
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def create_min_max_chart(df):
+    """Create max/min monthly sales per year chart"""
+    fig, ax = new_figure((10, 6))
+
+    bar_width = 0.35
+    x = range(len(df))
+
+    bars1 = ax.bar([i - bar_width / 2 for i in x], df['MAXSALESAMOUNT'],
+                   width=bar_width, color='orange', label='MAXSALESAMOUNT')
+    bars2 = ax.bar([i + bar_width / 2 for i in x], df['MINSALESAMOUNT'],
+                   width=bar_width, color='yellow', label='MINSALESAMOUNT')
+
+    for i, (bar1, bar2) in enumerate(zip(bars1, bars2)):
+        ax.text(bar1.get_x() + bar1.get_width() / 2, bar1.get_height() + 50000,
+                f"Tháng {df['MAXMONTH'].iloc[i]}", ha='center', va='bottom', fontsize=9)
+        ax.text(bar2.get_x() + bar2.get_width() / 2, bar2.get_height() + 50000,
+                f"Tháng {df['MINMONTH'].iloc[i]}", ha='center', va='bottom', fontsize=9)
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(df['YEAR'])
+    ax.set_ylabel("Sales Amount")
+    ax.set_title("MAX và MIN SALES AMOUNT theo năm và tháng")
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def create_top_growth_product_chart(df):
+    """Create top-growth product per year chart"""
+    fig, ax = new_figure((14, 8))
+    bars = ax.bar(df['YEAR_LABEL'], df['GROWTHSALES'], color='mediumseagreen')
+
+    # Thêm tên sản phẩm lên trên mỗi cột
+    for i, (bar, row) in enumerate(zip(bars, df.itertuples())):
+        # Rút ngắn tên sản phẩm nếu quá dài
+        product_name = row.PRODUCTNAME if hasattr(row, 'PRODUCTNAME') else f"Product {i+1}"
+        if len(product_name) > 15:
+            product_name = product_name[:12] + "..."
+
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            bar.get_height() + max(df['GROWTHSALES']) * 0.02,  # Offset 2% từ đỉnh cột
+            product_name,
+            rotation=90,
+            ha="left",
+            va="bottom",
+            fontsize=9,
+            color="black",
+            fontweight='bold'
+        )
+
+    # Tăng margin top để có chỗ cho text
+    ax.set_ylim(0, max(df['GROWTHSALES']) * 1.3)
+
+    ax.set_ylabel("Tăng trưởng (%)")
+    ax.set_xlabel("Giai đoạn")
+    ax.set_title("Top sản phẩm có tăng trưởng cao nhất từng năm")
+    ax.tick_params(axis='x', labelrotation=15)
+    fig.tight_layout()
+    return fig
+
+
+def create_channel_sales_chart(df):
+    """Create sales and volume per distribution channel chart"""
+    fig, ax = new_figure((10, 5))
+
+    x = np.arange(len(df['DISTRIBUTION_CHANNEL']))
+    width = 0.35
+
+    ax.bar(x - width/2, df['TOTALSALES'], width,
+           label='Tổng sản phẩm (TOTALSALES)', color='royalblue')
+    ax.bar(x + width/2, df['SALESAMOUNT'], width,
+           label='Doanh số (SALESAMOUNT)', color='darkorange')
+
+    ax.set_xlabel("Kênh phân phối")
+    ax.set_ylabel("Giá trị")
+    ax.set_title("Doanh số và khối lượng bán theo từng Distribution Channel")
+    ax.set_xticks(x)
+    ax.set_xticklabels(df['DISTRIBUTION_CHANNEL'], rotation=15, ha='right')
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def create_channel_growth_chart(df):
+    """Create growth per distribution channel chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((16, 8))
+    sns.lineplot(
+        data=df,
+        x="YEAR_LABEL",
+        y="GROWTHPERCENT",
+        hue="DISTRIBUTION_CHANNEL",
+        marker="o",
+        ax=ax
+    )
+
+    ax.axhline(0, color='gray', linestyle='--')
+    ax.set_title("Tăng trưởng doanh số theo từng kênh phân phối qua các năm")
+    ax.set_ylabel("Tăng trưởng (%)")
+    ax.set_xlabel("Năm")
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend(title="Kênh phân phối", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    return fig
+
+
+def create_top_manufacturer_chart(df):
+    """Create top manufacturer per year chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((10, 5))
+    sns.barplot(data=df, x='YEAR', y='SALESAMOUNT',
+                hue='MANUFACTURER', dodge=False, palette='Set2', ax=ax)
+
+    ax.set_title("Nhà sản xuất có doanh số cao nhất từng năm")
+    ax.set_ylabel("Doanh số")
+    ax.set_xlabel("Năm")
+    fig.tight_layout()
+    return fig
+
+
+def create_manufacturer_sales_chart(df):
+    """Create yearly sales per manufacturer chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((12, 6))
+    sns.lineplot(data=df, x="YEAR", y="SALESAMOUNT",
+                 hue="MANUFACTURER", marker="o", ax=ax)
+
+    ax.set_title("Sales Amount by Manufacturer (2018–2024)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Sales Amount")
+    ax.legend(title="Manufacturer", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    return fig
+
+
+def create_brand_by_channel_chart(df):
+    """Create best brand (average sales per product) per channel chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((12, 6))
+    sns.barplot(data=df, x="DISTRIBUTION_CHANNEL", y="AVG_SALES_PER_PRODUCT",
+                hue="BRAND", dodge=False, palette="pastel", ax=ax)
+
+    for i, row in df.iterrows():
+        ax.text(i, row["AVG_SALES_PER_PRODUCT"] + 5000, row["BRAND"],
+                ha="center", fontsize=9, fontweight='bold')
+
+    ax.set_title("Thương hiệu có hiệu suất doanh số trung bình mỗi sản phẩm tốt nhất trong từng kênh phân phối")
+    ax.set_ylabel("Average Sales per Product")
+    ax.set_xlabel("Distribution Channel")
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha('right')
+    ax.legend().remove()  # Remove legend since we have text labels
+    fig.tight_layout()
+    return fig
+
+
+def create_category_sales_chart(df):
+    """Create yearly sales per product category chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((12, 6))
+    sns.lineplot(data=df, x="YEAR", y="SALESAMOUNT", hue="CATEGORY", marker="o", ax=ax)
+
+    ax.set_title("Sales Amount by Product Category (2018–2024)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Sales Amount")
+    ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    return fig
+
+
+def _label_bars(ax, labels, heights_max, offset, max_len, fontsize):
+    # Ghi nhãn (rút gọn nếu quá dài) lên đỉnh từng cột theo thứ tự ax.patches
+    bars = ax.patches
+    for bar, label in zip(bars, labels):
+        if len(label) > max_len:
+            label = label[:max_len - 3] + "..."
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            bar.get_height() + heights_max * offset,
+            label,
+            rotation=90,
+            ha="left",
+            va="bottom",
+            fontsize=fontsize,
+            color="black",
+            fontweight='bold'
+        )
+
+
+def create_top_brand_by_category_chart(df):
+    """Create top brand per category per year chart"""
+    import seaborn as sns
+
+    fig, ax = new_figure((16, 10))
+    sns.barplot(data=df, x="YEAR", y="TOTALSALES", hue="CATEGORY", palette="Set2", ax=ax)
+
+    # Thêm tên thương hiệu lên trên mỗi cột, offset 1% từ đỉnh cột
+    _label_bars(ax, df['BRAND'], max(df['TOTALSALES']), 0.01, 12, 9)
+
+    # Tăng margin top để có chỗ cho text
+    ax.set_ylim(0, max(df['TOTALSALES']) * 1.25)
+
+    ax.set_title("Top Selling Brand per Category per Year", fontsize=16)
+    ax.set_ylabel("Total Sales")
+    ax.set_xlabel("Year")
+    ax.set_xticks(range(len(df["YEAR"].unique())))
+    ax.set_xticklabels(sorted(df["YEAR"].unique()))
+    ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    return fig
+
+
+def create_top_product_by_manufacturer_chart(df):
+    """Create yearly sales per manufacturer chart labelled with the top product"""
+    import seaborn as sns
+
+    fig, ax = new_figure((18, 10))
+    sns.barplot(
+        data=df,
+        x="YEAR",
+        y="SALESAMOUNT",
+        hue="MANUFACTURER",
+        ax=ax
+    )
+
+    # Thêm tên sản phẩm lên trên mỗi cột, offset 1% từ đỉnh cột
+    _label_bars(ax, df['PRODUCTNAME'], max(df['SALESAMOUNT']), 0.01, 15, 8)
+
+    # Tăng margin top để có chỗ cho text
+    ax.set_ylim(0, max(df['SALESAMOUNT']) * 1.3)
+
+    ax.set_title("Doanh số theo năm và nhà sản xuất (với tên sản phẩm bán chạy nhất)", fontsize=16)
+    ax.set_xlabel("Năm", fontsize=12)
+    ax.set_ylabel("Tổng doanh số", fontsize=12)
+    ax.legend(title="Nhà sản xuất", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+    return fig
+
+
+# ---------------------------------------------------------------------------
+# Registry: thứ tự ở đây là thứ tự trong sidebar
+# ---------------------------------------------------------------------------
+
+YEAR_FILTER = FilterSpec("YEAR", "Chọn năm:", sort_options=True)
+
+CHART_SPECS = [
+    ChartSpec(
+        "yearly_sales", "Doanh số theo năm", "📈 Doanh số theo từng năm",
+        "c1", create_yearly_sales_chart,
+        vega=vega_charts.yearly_sales,
+    ),
+    ChartSpec(
+        "monthly_volume", "Khối lượng bán theo tháng",
+        "📦 Khối lượng bán theo tháng trong từng năm",
+        "c2", create_monthly_volume_chart,
+        filter=YEAR_FILTER, tables=(TableSpec(source="filtered"),),
+        vega=vega_charts.monthly_volume,
+    ),
+    ChartSpec(
+        "quarterly_sales", "Doanh số theo quý", "📆 Doanh số theo từng quý trong năm",
+        "c3", create_quarterly_chart,
+        filter=YEAR_FILTER, tables=(TableSpec(source="filtered"),),
+        vega=vega_charts.quarterly_sales,
+    ),
+    ChartSpec(
+        "growth", "Tăng trưởng doanh số", "📊 Biểu đồ tăng trưởng doanh số theo năm (%)",
+        "c1", create_growth_chart, transform=yearly_growth,
+        tables=(TableSpec(source="data", columns=GROWTH_COLUMNS),),
+        vega=vega_charts.growth,
+    ),
+    ChartSpec(
+        "min_max_sales", "Min/Max doanh số",
+        "📊 Doanh số cao nhất và thấp nhất theo tháng trong từng năm",
+        "c5", create_min_max_chart,
+        vega=vega_charts.min_max_sales,
+    ),
+    ChartSpec(
+        "top_growth_product", "Top sản phẩm tăng trưởng",
+        "📈 Top sản phẩm có tăng trưởng cao nhất từng năm",
+        "c6", create_top_growth_product_chart, transform=add_year_label,
+        tables=(TableSpec(source="data"),),
+        vega=vega_charts.top_growth_product,
+    ),
+    ChartSpec(
+        "channel_sales", "Doanh số theo kênh phân phối",
+        "🏬 Doanh số và khối lượng bán theo Distribution Channel",
+        "c7", create_channel_sales_chart,
+        vega=vega_charts.channel_sales,
+    ),
+    ChartSpec(
+        "channel_growth", "Tăng trưởng theo kênh",
+        "📈 Tăng trưởng doanh số theo từng kênh phân phối",
+        "c8", create_channel_growth_chart,
+        transform=add_channel_year_label,
+        filter=FilterSpec("DISTRIBUTION_CHANNEL", "Chọn kênh phân phối:"),
+        tables=(TableSpec(source="data"),),
+        vega=vega_charts.channel_growth,
+    ),
+    ChartSpec(
+        "top_manufacturer", "Top nhà sản xuất",
+        "🏆 Nhà sản xuất có doanh số cao nhất từng năm",
+        "c9", create_top_manufacturer_chart, transform=top_manufacturer_each_year,
+        tables=(TableSpec(source="data"),),
+        vega=vega_charts.top_manufacturer,
+    ),
+    ChartSpec(
+        "manufacturer_sales", "Doanh số theo nhà sản xuất",
+        "📈 Doanh số theo từng Nhà sản xuất theo từng năm",
+        "c10", create_manufacturer_sales_chart,
+        filter=FilterSpec("MANUFACTURER", "Chọn nhà sản xuất:", dropna=True),
+        tables=(TableSpec(source="filtered"),),
+        vega=vega_charts.manufacturer_sales,
+    ),
+    ChartSpec(
+        "brand_by_channel", "Thương hiệu theo kênh",
+        "🏅 Thương hiệu có hiệu suất doanh số trung bình mỗi sản phẩm tốt nhất trong từng kênh phân phối",
+        "c11", create_brand_by_channel_chart,
+        vega=vega_charts.brand_by_channel,
+    ),
+    ChartSpec(
+        "category_sales", "Doanh số theo loại sản phẩm",
+        "📊 Doanh số theo từng Loại Sản phẩm (Product Category) từ 2018 đến 2024",
+        "c12", create_category_sales_chart,
+        vega=vega_charts.category_sales,
+    ),
+    ChartSpec(
+        "top_brand_by_category", "Top thương hiệu theo category",
+        "🏆 Thương hiệu có doanh số cao nhất trong từng Category theo từng năm",
+        "c13", create_top_brand_by_category_chart,
+        vega=vega_charts.top_brand_by_category,
+    ),
+    ChartSpec(
+        "top_product_by_manufacturer", "Top sản phẩm theo nhà sản xuất",
+        "🏆 Sản phẩm có doanh số cao nhất trong từng Manufacturer",
+        "c14", create_top_product_by_manufacturer_chart,
+        transform=top_product_by_manufacturer,
+        tables=(
+            TableSpec(
+                "📄 Xem dữ liệu chi tiết (bao gồm tên sản phẩm bán chạy)", "data",
+                ("YEAR", "MANUFACTURER", "PRODUCTNAME", "SALESAMOUNT"),
+            ),
+            TableSpec(),
+        ),
+        vega=vega_charts.top_product_by_manufacturer,
+    ),
+]
+
+SPECS_BY_LABEL = {spec.label: spec for spec in CHART_SPECS}
+SPECS_BY_ID = {spec.chart_id: spec for spec in CHART_SPECS}
@@ -0,0 +1,276 @@
+"""Chế độ dữ liệu thô: dựng rollup cube từ bảng fact bán hàng và suy ra c1–c14.
+
+Bảng fact có một dòng cho mỗi giao dịch (hoặc mỗi dòng đã gộp sẵn) với các cột
+trong ``FACT_COLUMNS``. Cube gộp bảng đó một lần theo toàn bộ các chiều, sau
+đó mọi sheet c1–c14 (và bất kỳ lát cắt mới nào) chỉ là một group-by trên cube
+nhỏ gọn thay vì phải xuất thêm sheet Excel.
+"""
+import numpy as np
+import pandas as pd
+
+from growth import FREQUENCIES, period_over_period
+from transforms import compact_frame, top_k_per_group
+
+DIMENSIONS = [
+    "YEAR", "MONTH", "DISTRIBUTION_CHANNEL", "MANUFACTURER",
+    "BRAND", "CATEGORY", "PRODUCTID", "PRODUCTNAME",
+]
+MEASURES = ["QUANTITY", "SALESAMOUNT"]
+FACT_COLUMNS = DIMENSIONS + MEASURES
+STRING_DIMENSIONS = ["DISTRIBUTION_CHANNEL", "MANUFACTURER", "BRAND", "CATEGORY", "PRODUCTNAME"]
+
+
+class RollupCube:
+    """Sales aggregated over every dimension, with memoized rollups"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._rollups = {}
+
+    @classmethod
+    def from_facts(cls, facts):
+        """Aggregate a row-level fact table into a cube"""
+        facts = prepare_facts(facts)
+        # Giữ cả dòng thiếu khoá: mỗi rollup chỉ bỏ dòng thiếu ở chính các chiều nó gộp theo
+        frame = (
+            facts.groupby(DIMENSIONS, observed=True, sort=True, dropna=False)[MEASURES]
+            .sum()
+            .reset_index()
+        )
+        return cls(frame)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def rollup(self, dims, measures=MEASURES):
+        """Sum measures over the given dimensions (cached per dimension set)"""
+        key = (tuple(dims), tuple(measures))
+        if key not in self._rollups:
+            self._rollups[key] = (
+                self.frame.groupby(list(dims), observed=True, sort=True)[list(measures)]
+                .sum()
+                .reset_index()
+            )
+        return self._rollups[key]
+
+    def distinct_count(self, dims, column):
+        """Number of distinct values of column within each group of dims"""
+        key = (tuple(dims), ("nunique", column))
+        if key not in self._rollups:
+            self._rollups[key] = (
+                self.frame.groupby(list(dims), observed=True, sort=True)[column]
+                .nunique()
+                .reset_index()
+            )
+        return self._rollups[key]
+
+    def growth(self, by=(), measure="SALESAMOUNT", freq="YoY"):
+        """Period-over-period growth of measure within each group of by (cached)"""
+        key = (tuple(by), ("growth", measure, freq))
+        if key not in self._rollups:
+            self._rollups[key] = period_over_period(
+                self._period_rollup(list(by), measure, freq), measure, freq, by
+            )
+        return self._rollups[key]
+
+    def _period_rollup(self, by, measure, freq):
+        # Tổng theo nhóm và kỳ; quý được gộp từ rollup theo tháng
+        if freq != "QoQ":
+            return self.rollup(by + list(FREQUENCIES[freq][0]), [measure])
+        monthly = self.rollup(by + ["YEAR", "MONTH"], [measure])
+        quarterly = monthly.assign(QUARTER=(monthly["MONTH"] - 1) // 3 + 1)
+        return (
+            quarterly.groupby(by + ["YEAR", "QUARTER"], observed=True, sort=True)[measure]
+            .sum()
+            .reset_index()
+        )
+
+
+class ProductIds:
+    """PRODUCTID for fact tables without one, numbered by first appearance of PRODUCTNAME
+
+    One instance numbers every chunk of a table; the in-memory cube, the
+    streaming ingest and ``build_sqlite`` all use it, so a table gets the
+    same ids (and top-product tie-breaks) whatever the source. Rows without
+    a name get 0.
+    """
+
+    def __init__(self):
+        self._ids = {}
+
+    def assign(self, chunk):
+        """Return chunk with a PRODUCTID column (unchanged if it has one or has no names)"""
+        if "PRODUCTID" in chunk.columns or "PRODUCTNAME" not in chunk.columns:
+            return chunk
+        # Chỉ lặp Python trên các tên khác nhau của chunk
+        codes, names = pd.factorize(chunk["PRODUCTNAME"])
+        ids = np.fromiter(
+            (self._ids.setdefault(name, len(self._ids) + 1) for name in names),
+            dtype=np.int64, count=len(names),
+        )
+        return chunk.assign(PRODUCTID=np.where(codes >= 0, ids[codes] if len(ids) else 0, 0))
+
+
+def prepare_facts(facts):
+    """Validate a fact table and give it compact dtypes"""
+    facts = ProductIds().assign(facts).copy()
+    missing = [column for column in FACT_COLUMNS if column not in facts.columns]
+    if missing:
+        raise ValueError(f"Bảng fact thiếu cột: {', '.join(missing)}")
+
+    facts = facts[FACT_COLUMNS]
+    for column in STRING_DIMENSIONS:
+        facts[column] = facts[column].astype("category")
+    return facts
+
+
+def _yearly_sales(cube):
+    return cube.rollup(["YEAR"])[["YEAR", "SALESAMOUNT"]]
+
+
+def _monthly_volume(cube):
+    monthly = cube.rollup(["YEAR", "MONTH"])
+    return monthly[["YEAR", "MONTH", "QUANTITY"]].rename(columns={"QUANTITY": "TOTALSALES"})
+
+
+def _quarterly_sales(cube):
+    monthly = cube.rollup(["YEAR", "MONTH"])
+    quarterly = monthly.assign(QUARTER=(monthly["MONTH"] - 1) // 3 + 1)
+    return quarterly.groupby(["YEAR", "QUARTER"], as_index=False)["SALESAMOUNT"].sum()
+
+
+def _min_max_months(cube):
+    monthly = cube.rollup(["YEAR", "MONTH"])
+    best = top_k_per_group(monthly, ["YEAR"], "SALESAMOUNT", k=1)
+    worst = top_k_per_group(monthly, ["YEAR"], "SALESAMOUNT", k=1, largest=False)
+    return pd.DataFrame({
+        "YEAR": best["YEAR"].to_numpy(),
+        "MAXMONTH": best["MONTH"].to_numpy(),
+        "MAXSALESAMOUNT": best["SALESAMOUNT"].to_numpy(),
+        "MINMONTH": worst["MONTH"].to_numpy(),
+        "MINSALESAMOUNT": worst["SALESAMOUNT"].to_numpy(),
+    })
+
+
+def _top_growth_product(cube):
+    pairs = cube.growth(["PRODUCTID", "PRODUCTNAME"])
+    product_growth = pd.DataFrame({
+        "YEAR1": pairs["YEAR_1"].to_numpy(),
+        "YEAR2": pairs["YEAR_2"].to_numpy(),
+        "PRODUCTID": pairs["PRODUCTID"].to_numpy(),
+        "PRODUCTNAME": pairs["PRODUCTNAME"].astype(str).to_numpy(),
+        "SALES_YEAR1": pairs["SALESAMOUNT_1"].to_numpy(),
+        "SALES_YEAR2": pairs["SALESAMOUNT_2"].to_numpy(),
+        "GROWTHSALES": pairs["GROWTH"].to_numpy(),
+        "GROWTHPERCENT": pairs["GROWTHPERCENT"].to_numpy(),
+    })
+    product_growth = product_growth[np.isfinite(product_growth["GROWTHPERCENT"])]
+    return (
+        top_k_per_group(product_growth, ["YEAR1"], "GROWTHPERCENT", k=1)
+        .assign(RN=1)
+        .reset_index(drop=True)
+    )
+
+
+def _channel_sales(cube):
+    channel = cube.rollup(["DISTRIBUTION_CHANNEL"])
+    channel_products = cube.distinct_count(["DISTRIBUTION_CHANNEL"], "PRODUCTID")
+    return pd.DataFrame({
+        "DISTRIBUTION_CHANNEL": channel["DISTRIBUTION_CHANNEL"].astype(str).to_numpy(),
+        "TOTALPRODUCT": channel_products["PRODUCTID"].to_numpy(),
+        "TOTALSALES": channel["QUANTITY"].to_numpy(),
+        "SALESAMOUNT": channel["SALESAMOUNT"].to_numpy(),
+    })
+
+
+def _channel_growth(cube):
+    pairs = cube.growth(["DISTRIBUTION_CHANNEL"])
+    return pd.DataFrame({
+        "DISTRIBUTION_CHANNEL": pairs["DISTRIBUTION_CHANNEL"].astype(str).to_numpy(),
+        "YEAR_1": pairs["YEAR_1"].to_numpy(),
+        "SALESAMOUNT_Y1": pairs["SALESAMOUNT_1"].to_numpy(),
+        "YEAR_2": pairs["YEAR_2"].to_numpy(),
+        "SALESAMOUNT_Y2": pairs["SALESAMOUNT_2"].to_numpy(),
+        "GROWTHPERCENT": pairs["GROWTHPERCENT"].to_numpy(),
+    })
+
+
+def _manufacturer_yearly(cube):
+    return _as_str(cube.rollup(["YEAR", "MANUFACTURER"], ["SALESAMOUNT"]), "MANUFACTURER")
+
+
+def _top_manufacturer(cube):
+    return top_k_per_group(
+        _manufacturer_yearly(cube), ["YEAR"], "SALESAMOUNT", k=1
+    ).reset_index(drop=True)
+
+
+def _brand_by_channel(cube):
+    brand_channel = cube.rollup(["DISTRIBUTION_CHANNEL", "BRAND"], ["QUANTITY"])
+    brand_products = cube.distinct_count(["DISTRIBUTION_CHANNEL", "BRAND"], "PRODUCTID")
+    brand_channel = brand_channel.assign(
+        AVG_SALES_PER_PRODUCT=(brand_channel["QUANTITY"] // brand_products["PRODUCTID"]).astype("int64")
+    )
+    return _as_str(
+        top_k_per_group(brand_channel, ["DISTRIBUTION_CHANNEL"], "AVG_SALES_PER_PRODUCT", k=1)
+        [["DISTRIBUTION_CHANNEL", "BRAND", "AVG_SALES_PER_PRODUCT"]],
+        "DISTRIBUTION_CHANNEL", "BRAND",
+    ).reset_index(drop=True)
+
+
+def _category_sales(cube):
+    return _as_str(cube.rollup(["YEAR", "CATEGORY"], ["SALESAMOUNT"]), "CATEGORY")
+
+
+def _top_brand_by_category(cube):
+    brand_category = cube.rollup(["YEAR", "CATEGORY", "BRAND"], ["QUANTITY"])
+    return _as_str(
+        top_k_per_group(brand_category, ["YEAR", "CATEGORY"], "QUANTITY", k=1)
+        .rename(columns={"QUANTITY": "TOTALSALES"}),
+        "CATEGORY", "BRAND",
+    ).reset_index(drop=True)
+
+
+def _top_product_by_manufacturer(cube):
+    product_manufacturer = cube.rollup(
+        ["YEAR", "MANUFACTURER", "PRODUCTID", "PRODUCTNAME"], ["SALESAMOUNT"]
+    )
+    return _as_str(
+        top_k_per_group(product_manufacturer, ["YEAR", "MANUFACTURER"], "SALESAMOUNT", k=1),
+        "MANUFACTURER", "PRODUCTNAME",
+    ).reset_index(drop=True)
+
+
+# Sheet -> hàm dựng sheet đó từ cube (cùng schema với data.xlsx). Không có c4: tăng
+# trưởng theo năm được tính từ c1 khi hiển thị
+SHEET_BUILDERS = {
+    "c1": _yearly_sales,
+    "c2": _monthly_volume,
+    "c3": _quarterly_sales,
+    "c5": _min_max_months,
+    "c6": _top_growth_product,
+    "c7": _channel_sales,
+    "c8": _channel_growth,
+    "c9": _top_manufacturer,
+    "c10": _manufacturer_yearly,
+    "c11": _brand_by_channel,
+    "c12": _category_sales,
+    "c13": _top_brand_by_category,
+    "c14": _top_product_by_manufacturer,
+}
+
+
+def derive_sheet(cube, sheet):
+    """Compute one analysis sheet (same schema as data.xlsx) from the cube, in compact dtypes"""
+    return compact_frame(SHEET_BUILDERS[sheet](cube))
+
+
+def derive_sheets(cube):
+    """Compute every analysis sheet (same schema as data.xlsx) from the cube"""
+    return {sheet: derive_sheet(cube, sheet) for sheet in SHEET_BUILDERS}
+
+
+def _as_str(df, *columns):
+    # Các sheet Excel có cột chuỗi thường; đổi categorical về str cho giống
+    return df.assign(**{column: df[column].astype(str) for column in columns})
+
@@ -0,0 +1,496 @@
+"""Đọc workbook data.xlsx và cache dữ liệu dạng cột (Arrow IPC) bên cạnh file.
+
+Workbook chỉ được parse một lần cho tất cả các sheet. Kết quả được ghi thành
+các file Arrow IPC không nén trong thư mục ``.data_cache`` để những lần khởi
+động sau chỉ cần memory-map mà không phải chạm tới openpyxl.
+
+Khi workbook thay đổi, chỉ những sheet có phần XML (hoặc bảng chuỗi dùng
+chung) khác đi mới được parse lại; sheet nào có nội dung thực sự khác thì mới
+được coi là "đã thay đổi" (so bằng fingerprint nội dung).
+
+``WorkbookStore`` nạp từng sheet khi cần: trang chỉ chờ sheet của phân tích
+đang xem, phần còn lại được nạp nền bằng ``load_all``.
+"""
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import tempfile
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from transforms import compact_frame
+
+logger = logging.getLogger("candy.data")
+
+# Schema chung của mọi bộ dữ liệu: sheet -> các cột bắt buộc. Sheet c4 của workbook
+# không còn được đọc: biểu đồ tăng trưởng theo năm tính lại từ c1
+SHEET_COLUMNS = {
+    "c1": ("YEAR", "SALESAMOUNT"),
+    "c2": ("YEAR", "MONTH", "TOTALSALES"),
+    "c3": ("YEAR", "QUARTER", "SALESAMOUNT"),
+    "c5": ("YEAR", "MAXMONTH", "MAXSALESAMOUNT", "MINMONTH", "MINSALESAMOUNT"),
+    "c6": ("YEAR1", "YEAR2", "PRODUCTID", "PRODUCTNAME", "SALES_YEAR1", "SALES_YEAR2",
+           "GROWTHSALES", "GROWTHPERCENT", "RN"),
+    "c7": ("DISTRIBUTION_CHANNEL", "TOTALPRODUCT", "TOTALSALES", "SALESAMOUNT"),
+    "c8": ("DISTRIBUTION_CHANNEL", "YEAR_1", "SALESAMOUNT_Y1", "YEAR_2", "SALESAMOUNT_Y2",
+           "GROWTHPERCENT"),
+    "c9": ("YEAR", "MANUFACTURER", "SALESAMOUNT"),
+    "c10": ("YEAR", "MANUFACTURER", "SALESAMOUNT"),
+    "c11": ("DISTRIBUTION_CHANNEL", "BRAND", "AVG_SALES_PER_PRODUCT"),
+    "c12": ("YEAR", "CATEGORY", "SALESAMOUNT"),
+    "c13": ("YEAR", "CATEGORY", "BRAND", "TOTALSALES"),
+    "c14": ("YEAR", "MANUFACTURER", "PRODUCTID", "PRODUCTNAME", "SALESAMOUNT"),
+}
+SHEET_NAMES = list(SHEET_COLUMNS)
+CACHE_DIR_NAME = ".data_cache"
+MANIFEST_NAME = "manifest.json"
+CACHE_VERSION = 4
+
+# Các phần dùng chung của xlsx: đổi một trong số này thì mọi sheet có thể đổi theo
+SHARED_PARTS = ("xl/sharedStrings.xml", "xl/styles.xml")
+SHARED_KEY = "__shared__"
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_fingerprint(df):
+    """Return a short content hash of a DataFrame (values, index and columns)"""
+    digest = hashlib.sha1()
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr(list(df.dtypes.astype(str))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def frames_nbytes(frames):
+    """Total memory of DataFrames, including string and categorical data"""
+    return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+
+
+def sheet_part_checksums(path):
+    """Map sheet name -> CRC32 of its worksheet XML inside the xlsx zip
+
+    Only the small workbook.xml and its relationships are parsed; the CRCs
+    come from the zip directory, so no sheet XML is read. The combined CRC
+    of the shared parts is stored under ``SHARED_KEY``. Returns an empty
+    dict when the file is not a readable xlsx package.
+    """
+    try:
+        with zipfile.ZipFile(path) as package:
+            members = {info.filename: info.CRC for info in package.infolist()}
+            workbook = ElementTree.fromstring(package.read("xl/workbook.xml"))
+            rels = ElementTree.fromstring(package.read("xl/_rels/workbook.xml.rels"))
+    except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        return {}
+
+    targets = {}
+    for rel in rels.iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        # Target có thể là đường dẫn tuyệt đối trong package hoặc tương đối với xl/
+        target = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+        targets[rel.get("Id")] = posixpath.normpath(target)
+
+    checksums = {}
+    for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+        part = targets.get(sheet.get(f"{_NS_REL}id"))
+        if part in members:
+            checksums[sheet.get("name")] = members[part]
+    checksums[SHARED_KEY] = "-".join(str(members.get(part)) for part in SHARED_PARTS)
+    return checksums
+
+
+def changed_parts(old, new, sheet_names):
+    """Sheets whose worksheet XML (or the shared parts) differ between two checksum maps"""
+    if not old or not new or old.get(SHARED_KEY) != new.get(SHARED_KEY):
+        return list(sheet_names)
+    return [sheet for sheet in sheet_names if sheet not in new or old.get(sheet) != new.get(sheet)]
+
+
+def cache_dir_for(path):
+    """Return the cache directory used for a workbook"""
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, CACHE_DIR_NAME, os.path.splitext(name)[0])
+
+
+def _sheet_file(cache_dir, sheet):
+    return os.path.join(cache_dir, f"{sheet}.arrow")
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def replace_file(target, write):
+    """Write through a temp file next to target, then rename it into place"""
+    # Ghi file tạm rồi đổi tên để không bao giờ để lại file dở dang; tên tạm riêng cho
+    # mỗi lần ghi vì nhiều process có thể cùng khởi động lạnh trên một workbook
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=os.path.basename(target) + ".",
+                               suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_manifest(cache_dir, manifest):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    replace_file(os.path.join(cache_dir, MANIFEST_NAME), write)
+
+
+def _usable_manifest(cache_dir, manifest, sheet_names):
+    if not manifest or manifest.get("version") != CACHE_VERSION:
+        return False
+    if any(sheet not in manifest.get("sheets", {}) for sheet in sheet_names):
+        return False
+    return all(os.path.exists(_sheet_file(cache_dir, sheet)) for sheet in sheet_names)
+
+
+def _cache_is_valid(path, cache_dir, manifest, sheet_names):
+    """Check the manifest against the workbook's mtime/size, then its hash"""
+    if not _usable_manifest(cache_dir, manifest, sheet_names):
+        return False
+
+    stat = os.stat(path)
+    if manifest.get("mtime_ns") == stat.st_mtime_ns and manifest.get("size") == stat.st_size:
+        return True
+
+    # mtime thay đổi (vd. copy lại file) nhưng nội dung có thể vẫn như cũ
+    if manifest.get("sha256") != file_hash(path):
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    manifest["size"] = stat.st_size
+    try:
+        _write_manifest(cache_dir, manifest)
+    except OSError:
+        pass
+    return True
+
+
+def validate_sheet(sheet, df, source=""):
+    """Raise ValueError if a sheet lacks any column the analyses expect"""
+    missing = [column for column in SHEET_COLUMNS.get(sheet, ()) if column not in df.columns]
+    if missing:
+        where = f"{source}: " if source else ""
+        raise ValueError(f"{where}sheet {sheet} thiếu cột {', '.join(missing)}")
+
+
+def parse_workbook(path, sheet_names=SHEET_NAMES):
+    """Parse and validate the requested sheets with a single pass over the workbook, in compact dtypes"""
+    sheets = pd.read_excel(path, sheet_name=list(sheet_names))
+    for sheet, df in sheets.items():
+        validate_sheet(sheet, df, os.path.basename(path))
+    # Cache cột lưu luôn dạng gọn (categorical, số nguyên nhỏ) nên đọc lại không phải đổi kiểu
+    return {sheet: compact_frame(df) for sheet, df in sheets.items()}
+
+
+def write_cache(path, data_sheets, fingerprints=None, only=None, checksums=None):
+    """Write parsed sheets to the columnar cache next to the workbook
+
+    ``only`` limits which sheet files are rewritten; the manifest always
+    describes every sheet in ``data_sheets``.
+    """
+    cache_dir = cache_dir_for(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fingerprints = fingerprints or {}
+
+    stat = os.stat(path)
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": os.path.basename(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(path),
+        "parts": checksums if checksums is not None else sheet_part_checksums(path),
+        "sheets": {},
+    }
+    for sheet, df in data_sheets.items():
+        if only is None or sheet in only:
+            # Không nén để có thể memory-map trực tiếp khi đọc lại
+            replace_file(
+                _sheet_file(cache_dir, sheet),
+                lambda tmp: feather.write_feather(df, tmp, compression="uncompressed"),
+            )
+        manifest["sheets"][sheet] = {
+            "rows": len(df),
+            "columns": list(df.columns),
+            "fingerprint": fingerprints.get(sheet) or data_fingerprint(df),
+        }
+    _write_manifest(cache_dir, manifest)
+
+
+def read_cached_sheet(cache_dir, sheet, entry=None):
+    """Memory-map one cached sheet as a DataFrame; None if the file is unreadable
+
+    ``entry`` is the sheet's manifest entry: a file whose rows or columns
+    differ from it is treated as unreadable too, so the caller re-parses.
+    """
+    try:
+        table = feather.read_table(_sheet_file(cache_dir, sheet), memory_map=True)
+    except (OSError, ValueError):  # ArrowInvalid (file bị cắt cụt, hỏng) là một ValueError
+        return None
+    if entry is not None and (table.num_rows != entry.get("rows")
+                              or table.column_names != entry.get("columns")):
+        return None
+    return table.to_pandas()
+
+
+def load_sheets(path, sheet_names, manifest=None):
+    """Load only the given sheets; returns (sheets, fingerprints, names of parsed sheets)
+
+    A sheet is read from the columnar cache when the workbook is unchanged
+    or when its own worksheet XML (and the shared parts) are unchanged;
+    the rest are parsed together in one pass. Nothing is written to the
+    cache, since the manifest describes the whole workbook.
+    """
+    cache_dir = cache_dir_for(path)
+    if manifest is None:
+        manifest = _read_manifest(cache_dir)
+    cached = [sheet for sheet in sheet_names if _usable_manifest(cache_dir, manifest, [sheet])]
+    if cached:
+        stat = os.stat(path)
+        if manifest.get("mtime_ns") != stat.st_mtime_ns or manifest.get("size") != stat.st_size:
+            stale = set(changed_parts(manifest.get("parts"), sheet_part_checksums(path), cached))
+            cached = [sheet for sheet in cached if sheet not in stale]
+
+    sheets, fingerprints = {}, {}
+    for sheet in cached:
+        df = read_cached_sheet(cache_dir, sheet, manifest["sheets"][sheet])
+        # File cache không đọc được thì coi như cũ: sheet đó được parse lại
+        if df is not None:
+            sheets[sheet] = df
+            fingerprints[sheet] = manifest["sheets"][sheet]["fingerprint"]
+
+    parsed = [sheet for sheet in sheet_names if sheet not in sheets]
+    if parsed:
+        fresh = parse_workbook(path, parsed)
+        sheets.update(fresh)
+        fingerprints.update((sheet, data_fingerprint(df)) for sheet, df in fresh.items())
+    return sheets, fingerprints, set(parsed)
+
+
+def load_workbook(path="data.xlsx", sheet_names=SHEET_NAMES):
+    """Load all sheets, using the columnar cache when it matches the workbook"""
+    return load_workbook_with_fingerprints(path, sheet_names)[0]
+
+
+def load_workbook_with_fingerprints(path="data.xlsx", sheet_names=SHEET_NAMES):
+    """Like load_workbook, but also return each sheet's content fingerprint
+
+    When the cache is stale, sheets whose worksheet XML is unchanged are
+    still read from the cache and only the others are parsed.
+    """
+    cache_dir = cache_dir_for(path)
+    manifest = _read_manifest(cache_dir)
+    checksums = None
+    if _cache_is_valid(path, cache_dir, manifest, sheet_names):
+        stale = []
+    else:
+        checksums = sheet_part_checksums(path)
+        stale = list(sheet_names)
+        if _usable_manifest(cache_dir, manifest, sheet_names):
+            stale = list(changed_parts(manifest.get("parts"), checksums, sheet_names))
+
+    sheets, fingerprints = {}, {}
+    for sheet in sheet_names:
+        if sheet in stale:
+            continue
+        df = read_cached_sheet(cache_dir, sheet, manifest["sheets"][sheet])
+        if df is None:
+            # File cache hỏng (vd. bị cắt cụt): parse lại và ghi đè sheet đó
+            stale.append(sheet)
+            continue
+        sheets[sheet] = df
+        fingerprints[sheet] = manifest["sheets"][sheet]["fingerprint"]
+    if not stale:
+        return sheets, fingerprints
+
+    parsed = parse_workbook(path, stale)
+    sheets.update(parsed)
+    fingerprints.update((sheet, data_fingerprint(df)) for sheet, df in parsed.items())
+    sheets = {sheet: sheets[sheet] for sheet in sheet_names}
+
+    try:
+        write_cache(path, sheets, fingerprints, only=stale, checksums=checksums)
+    except OSError:
+        # Thư mục chỉ đọc: vẫn trả về dữ liệu, chỉ là không có cache
+        pass
+    return sheets, fingerprints
+
+
+class WorkbookStore:
+    """In-process copy of the workbook sheets, loaded per sheet and refreshed per sheet
+
+    ``sheet(name)`` loads just that sheet the first time it is asked for,
+    so a page waits for one sheet rather than the whole workbook;
+    ``load_all()`` fills in the rest (meant for a background thread).
+    ``refresh()`` is cheap when the file is untouched (a single
+    ``os.stat``). When the workbook changes, only loaded sheets whose XML
+    part changed are parsed again, and only sheets whose content
+    fingerprint differs are swapped in and reported; ``generation`` counts
+    those swaps. ``sheets`` and ``fingerprints`` are replaced as whole
+    dicts, so a reader holding the previous dict keeps a consistent
+    snapshot.
+    """
+
+    def __init__(self, path="data.xlsx", sheet_names=SHEET_NAMES):
+        self.path = path
+        self.sheet_names = list(sheet_names)
+        self.sheets = {}
+        self.fingerprints = {}
+        self.generation = 0
+        self._stat = None
+        self._checksums = {}
+        # Sheet đã parse từ xlsx nhưng chưa ghi vào cache cột
+        self._unsaved = set()
+        # Sheet không nạp được ở lượt nạp nền gần nhất -> lỗi
+        self.failed = {}
+        self._lock = threading.Lock()
+        self._sheet_locks = {sheet: threading.Lock() for sheet in self.sheet_names}
+
+    def _file_state(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def complete(self):
+        """Whether every sheet is in memory"""
+        return len(self.sheets) == len(self.sheet_names)
+
+    @property
+    def nbytes(self):
+        """Memory held by the loaded sheets"""
+        return frames_nbytes(self.sheets.values())
+
+    def _store(self, names, stat):
+        # Nạp các sheet names; bỏ kết quả nếu refresh() đã chạy trong lúc đọc file
+        sheets, fingerprints, parsed = load_sheets(self.path, names)
+        with self._lock:
+            if self._stat != stat:
+                return False
+            self.sheets = {**self.sheets, **sheets}
+            self.fingerprints = {**self.fingerprints, **fingerprints}
+            self._unsaved |= parsed
+            self.failed = {name: error for name, error in self.failed.items() if name not in sheets}
+            return True
+
+    def sheet(self, name):
+        """One sheet, loading only that sheet if it is not in memory yet"""
+        if name not in self._sheet_locks:
+            raise KeyError(f"Không có sheet {name}")
+        with self._sheet_locks[name]:
+            while name not in self.sheets:
+                self._store([name], self._stat)
+        return self.sheets[name]
+
+    def load_all(self):
+        """Load every missing sheet and save parsed ones to the cache; returns (sheets, fingerprints)
+
+        Missing sheets are read in one pass. A page asking for one of them
+        meanwhile does not wait for this: ``sheet()`` loads it on its own.
+        If that pass fails (e.g. one sheet lacks a column), the sheets are
+        read one at a time; those that still fail are logged, left out of
+        the result and kept in ``failed``.
+        """
+        try:
+            while True:
+                missing = [sheet for sheet in self.sheet_names if sheet not in self.sheets]
+                if not missing or self._store(missing, self._stat):
+                    break
+        except Exception:
+            # Một sheet hỏng không được chặn các sheet còn lại
+            for name in [sheet for sheet in self.sheet_names if sheet not in self.sheets]:
+                try:
+                    self.sheet(name)
+                except Exception as e:
+                    logger.error("Không nạp được sheet %s của %s: %s", name, self.path, e)
+                    self.failed[name] = e
+
+        with self._lock:
+            # Chỉ ghi cache khi dữ liệu trong bộ nhớ khớp với file hiện tại
+            if self._unsaved and self.complete and self._file_state() == self._stat:
+                try:
+                    write_cache(self.path, self.sheets, self.fingerprints,
+                                only=self._unsaved, checksums=self._checksums or None)
+                    self._unsaved = set()
+                except OSError:
+                    # Thư mục chỉ đọc: vẫn dùng dữ liệu trong bộ nhớ, chỉ là không có cache
+                    pass
+            return self.sheets, self.fingerprints
+
+    def refresh(self):
+        """Reload loaded sheets that changed on disk; return the set of changed sheet names"""
+        state = self._file_state()
+        if state == self._stat:
+            return set()
+
+        with self._lock:
+            if state == self._stat:
+                return set()
+
+            checksums = sheet_part_checksums(self.path)
+            if self._stat is None:
+                # Lần đầu: chỉ ghi nhận trạng thái file, các sheet được nạp khi cần
+                self._checksums = checksums
+                self._stat = state
+                return set()
+
+            candidates = [
+                sheet for sheet in changed_parts(self._checksums, checksums, self.sheet_names)
+                if sheet in self.sheets
+            ]
+            reloaded = parse_workbook(self.path, candidates) if candidates else {}
+
+            changed = set()
+            sheets = dict(self.sheets)
+            fingerprints = dict(self.fingerprints)
+            for sheet, df in reloaded.items():
+                fingerprint = data_fingerprint(df)
+                if fingerprint != fingerprints.get(sheet):
+                    sheets[sheet] = df
+                    fingerprints[sheet] = fingerprint
+                    changed.add(sheet)
+
+            self.sheets = sheets
+            self.fingerprints = fingerprints
+            self._checksums = checksums
+            self._stat = state
+            self._unsaved |= changed
+            if changed:
+                self.generation += 1
+            if self.complete and self._unsaved:
+                try:
+                    write_cache(self.path, sheets, fingerprints, only=self._unsaved, checksums=checksums)
+                    self._unsaved = set()
+                except OSError:
+                    pass
+            return changed
@@ -0,0 +1,208 @@
+"""Nhiều bộ dữ liệu cùng schema (vd. mỗi vùng một workbook) trong một process.
+
+Mỗi bộ dữ liệu có store riêng (``WorkbookStore`` cho .xlsx, ``SQLSource`` cho
+SQLite/DuckDB), được tạo khi được chọn lần đầu và giữ lại để lần sau không
+phải parse lại. Tổng bộ nhớ của các store bị chặn: vượt ngưỡng thì cả bộ dữ
+liệu ít được dùng gần đây nhất bị bỏ ra, cùng với các frame / index đã dựng từ
+nó (``DerivedCache``).
+
+Cấu hình qua ``SALES_DATASETS``: ``"bac=data/bac.xlsx,nam=data/nam.xlsx"``
+hoặc một thư mục (mỗi file .xlsx/.db/.duckdb trong đó là một bộ dữ liệu).
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from data_loader import WorkbookStore
+from sql_source import ENGINES_BY_SUFFIX, SQLSource
+
+logger = logging.getLogger("candy.data")
+
+WORKBOOK_SUFFIXES = (".xlsx", ".xlsm")
+DATASET_SUFFIXES = WORKBOOK_SUFFIXES + tuple(ENGINES_BY_SUFFIX)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Số frame / index dựng sẵn (transform, filter index, cửa sổ bảng) giữ cho mỗi bộ dữ liệu
+DEFAULT_DERIVED_ENTRIES = 128
+
+
+def dataset_paths(config, default="data.xlsx"):
+    """Map dataset name -> file from a "name=path,..." list, a directory or a single file"""
+    config = (config or "").strip() or default
+    if os.path.isdir(config):
+        names = sorted(name for name in os.listdir(config) if name.lower().endswith(DATASET_SUFFIXES))
+        paths = {}
+        for name in names:
+            stem = os.path.splitext(name)[0]
+            if stem in paths:
+                # vd. south.xlsx và south.db: không đoán file nào là bộ dữ liệu "south"
+                raise ValueError(f"Trùng tên bộ dữ liệu {stem}: {os.path.basename(paths[stem])} và {name}")
+            paths[stem] = os.path.join(config, name)
+    elif "=" in config:
+        paths = {}
+        for item in config.split(","):
+            name, sep, path = item.partition("=")
+            if not sep or not name.strip() or not path.strip():
+                raise ValueError(f"Bộ dữ liệu không hợp lệ: {item!r} (dạng tên=đường_dẫn)")
+            paths[name.strip()] = path.strip()
+    else:
+        paths = {os.path.splitext(os.path.basename(config))[0]: config}
+    if not paths:
+        raise ValueError(f"Không tìm thấy bộ dữ liệu nào trong {config}")
+    return paths
+
+
+def open_store(path):
+    """Sheet store for one dataset file, chosen by its extension"""
+    if path.lower().endswith(tuple(ENGINES_BY_SUFFIX)):
+        return SQLSource(path)
+    if path.lower().endswith(WORKBOOK_SUFFIXES):
+        return WorkbookStore(path)
+    raise ValueError(f"Không hỗ trợ loại file: {path}")
+
+
+class DerivedCache:
+    """Thread-safe LRU of objects built from one dataset's sheets
+
+    Keys start with ``(kind, chart_id, fingerprint)``. An entry being built
+    by two sessions at once is kept once: the later one gets the first.
+    """
+
+    def __init__(self, max_entries=DEFAULT_DERIVED_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        # Dựng ngoài lock: session đang đọc entry khác không phải chờ
+        value = build()
+        with self._lock:
+            value = self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key matches predicate"""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+
+class DatasetRegistry:
+    """Stores of several datasets with LRU eviction of whole datasets past max_bytes
+
+    Stores are created on first use. ``evict()`` drops least recently
+    used datasets until the loaded ones fit in ``max_bytes``; the most
+    recently used one is always kept, even if it alone is larger. Sizes
+    are those last measured by ``measure()``. Each loaded dataset also
+    owns a ``DerivedCache`` that is dropped with it.
+    """
+
+    def __init__(self, paths, max_bytes=DEFAULT_MAX_BYTES):
+        self.paths = dict(paths)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._stores = OrderedDict()
+        self._derived = {}
+        # Bộ nhớ của mỗi store lần đo gần nhất; đo lại chỉ khi store nạp / làm mới sheet
+        self._sizes = {}
+        # Bộ dữ liệu đã bị bỏ ra và chưa được mở lại
+        self._evicted = set()
+        # Số thứ tự lần mở store của mỗi bộ dữ liệu: mở lại sau khi bị bỏ là một phiên bản mới
+        self._opened = {}
+        self._serial = 0
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return list(self.paths)
+
+    def loaded(self):
+        """Names of the datasets held in memory, least recently used first"""
+        with self._lock:
+            return list(self._stores)
+
+    def store(self, name):
+        """Store of a dataset, created on first use and marked most recently used"""
+        if name not in self.paths:
+            raise KeyError(f"Không có bộ dữ liệu {name}")
+        with self._lock:
+            return self._open(name)
+
+    def derived(self, name):
+        """Derived-object cache of a loaded dataset, released when the dataset is evicted"""
+        if name not in self.paths:
+            raise KeyError(f"Không có bộ dữ liệu {name}")
+        with self._lock:
+            derived = self._derived.get(name)
+        # Bộ dữ liệu vừa bị bỏ ra: không mở lại chỉ để giữ frame dựng từ dữ liệu cũ
+        return derived if derived is not None else DerivedCache()
+
+    def _open(self, name):
+        store = self._stores.get(name)
+        if store is None:
+            if name in self._evicted:
+                self._evicted.discard(name)
+                logger.info("Mở lại bộ dữ liệu %s đã bị bỏ ra khỏi bộ nhớ", name)
+            store = self._stores[name] = open_store(self.paths[name])
+            self._derived[name] = DerivedCache()
+            self._sizes[name] = 0
+            self._serial += 1
+            self._opened[name] = self._serial
+        self._stores.move_to_end(name)
+        return store
+
+    def data_version(self, name):
+        """Identifies the data a dataset's store currently holds (changes on reopen or refresh)"""
+        store = self.store(name)
+        return name, self._opened[name], store.generation
+
+    def fingerprints(self):
+        """Fingerprints of every sheet held by the loaded datasets"""
+        with self._lock:
+            stores = list(self._stores.values())
+        return {fingerprint for store in stores for fingerprint in store.fingerprints.values()}
+
+    def nbytes(self):
+        """Memory held by every loaded dataset, as last measured"""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def measure(self, name):
+        """Re-measure a dataset's memory after it loaded or refreshed sheets"""
+        with self._lock:
+            store = self._stores.get(name)
+        if store is None:
+            return
+        # Đo sâu (memory_usage) ngoài lock: các session khác không phải chờ
+        size = store.nbytes
+        with self._lock:
+            if self._stores.get(name) is store:
+                self._sizes[name] = size
+
+    def evict(self):
+        """Drop least recently used datasets until the total fits; returns the dropped stores"""
+        evicted = []
+        with self._lock:
+            total = sum(self._sizes.values())
+            while total > self.max_bytes and len(self._stores) > 1:
+                name, store = self._stores.popitem(last=False)
+                # Frame dựng từ bộ dữ liệu này cũng phải được trả lại, không thì trần bộ nhớ vô nghĩa
+                del self._derived[name]
+                total -= self._sizes.pop(name)
+                self._evicted.add(name)
+                evicted.append(store)
+            self.evictions += len(evicted)
+        for store in evicted:
+            if hasattr(store, "close"):
+                store.close()
+        return evicted
@@ -0,0 +1,249 @@
+"""Xuất các biểu đồ ra file PNG/SVG/PDF (cho báo cáo tuần), không cần Streamlit.
+
+Dùng lại đúng pipeline của trang (transform -> lọc -> render) và render song
+song trên nhiều process. Mỗi file được ghi kèm hash nội dung đầu vào (dữ liệu
+sheet, bộ lọc, định dạng, DPI và mã nguồn vẽ biểu đồ) trong ``manifest.json``
+của thư mục xuất; lần chạy sau bỏ qua những file có hash không đổi::
+
+    python export.py --formats png,pdf --out reports/2024-w05
+    python export.py --only monthly_volume,channel_growth --filter monthly_volume=2023,2024
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import charts
+import growth
+import transforms
+from chart_cache import DEFAULT_DPI
+from charts import CHART_SPECS, SPECS_BY_ID, filter_index
+from data_loader import data_fingerprint, file_hash, load_workbook_with_fingerprints, replace_file
+from ingest import load_fact_sheets
+from prerender import render_default
+from sql_source import ENGINES_BY_SUFFIX, SQLSource
+from transforms import selection_key
+
+logger = logging.getLogger("candy.export")
+
+FORMATS = ("png", "svg", "pdf")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def code_version():
+    """Hash of the modules that decide how a chart looks"""
+    digest = hashlib.sha256()
+    for module in (charts, growth, transforms):
+        digest.update(file_hash(module.__file__).encode())
+    return digest.hexdigest()[:16]
+
+
+def export_hash(chart_id, fingerprint, filters, fmt, dpi, code):
+    """Content hash of everything that determines one exported file"""
+    payload = json.dumps([chart_id, fingerprint, selection_key(filters), fmt, dpi, code])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def export_name(chart_id, fmt, selection=None):
+    """File name of one export; a chosen selection adds a short hash of it"""
+    if selection is None:
+        return f"{chart_id}.{fmt}"
+    # Mỗi lựa chọn một file riêng: xuất có lọc không ghi đè bản đầy đủ (hay bản lọc khác)
+    digest = hashlib.sha256(json.dumps(selection_key(selection)).encode()).hexdigest()[:8]
+    return f"{chart_id}-{digest}.{fmt}"
+
+
+def parse_filters(values):
+    """Parse repeated ``chart_id=v1,v2`` arguments into {chart_id: [str values]}"""
+    filters = {}
+    for value in values:
+        chart_id, sep, options = value.partition("=")
+        if not sep or chart_id not in SPECS_BY_ID:
+            raise ValueError(f"Bộ lọc không hợp lệ: {value!r} (dạng chart_id=giá_trị1,giá_trị2)")
+        if SPECS_BY_ID[chart_id].filter is None:
+            raise ValueError(f"Phân tích {chart_id} không có bộ lọc")
+        filters[chart_id] = [option.strip() for option in options.split(",") if option.strip()]
+    return filters
+
+
+def resolve_selection(spec, raw, wanted):
+    """Map filter values given as strings onto the analysis' real option values"""
+    data = spec.transform(raw) if spec.transform else raw
+    options = filter_index(data, spec.filter).options
+    if wanted is None:
+        return options
+    by_text = {str(option): option for option in options}
+    unknown = [value for value in wanted if value not in by_text]
+    if unknown:
+        raise ValueError(f"{spec.chart_id}: không có giá trị {', '.join(unknown)} "
+                         f"(chọn trong {', '.join(by_text)})")
+    return [by_text[value] for value in wanted]
+
+
+def _read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("files", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def _write_manifest(out_dir, files, summary):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files, "last_run": summary},
+                      f, indent=2, ensure_ascii=False)
+
+    replace_file(os.path.join(out_dir, MANIFEST_NAME), write)
+
+
+def _export_job(chart_id, raw, selection, fmt, dpi, path):
+    started = time.perf_counter()
+    payload = render_default(chart_id, raw, selection, fmt=fmt, dpi=dpi)
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            f.write(payload)
+
+    # Tên tạm riêng cho mỗi lần ghi: hai lượt xuất cùng thư mục không ghi đè file tạm của nhau
+    replace_file(path, write)
+    return len(payload), time.perf_counter() - started
+
+
+def export_charts(data_sheets, fingerprints, out_dir, formats=("png",), only=None, filters=None,
+                  dpi=DEFAULT_DPI, workers=None, force=False):
+    """Render the chosen analyses to files in out_dir; returns (result rows, summary)
+
+    Files whose inputs hash the same as in the previous export (and still
+    exist) are skipped unless ``force`` is set.
+    """
+    filters = filters or {}
+    os.makedirs(out_dir, exist_ok=True)
+    previous = {} if force else _read_manifest(out_dir)
+    code = code_version()
+
+    files = {}
+    results = []
+    jobs = []
+    for spec in CHART_SPECS:
+        if only and spec.chart_id not in only:
+            continue
+        if spec.sheet not in data_sheets:
+            # Sheet không nạp được (vd. bảng thiếu trong nguồn SQL): bỏ qua, các phân tích khác vẫn xuất
+            logger.error("Không xuất %s: sheet %s không nạp được", spec.chart_id, spec.sheet)
+            for fmt in formats:
+                results.append({"file": export_name(spec.chart_id, fmt), "status": "failed: no sheet",
+                                "ms": 0.0, "bytes": 0})
+            continue
+        raw = data_sheets[spec.sheet]
+        selection = None
+        if spec.filter is not None:
+            selection = resolve_selection(spec, raw, filters.get(spec.chart_id))
+        chosen = selection if spec.chart_id in filters else None
+        for fmt in formats:
+            name = export_name(spec.chart_id, fmt, chosen)
+            digest = export_hash(
+                spec.chart_id, fingerprints.get(spec.sheet), selection or [], fmt, dpi, code
+            )
+            entry = {"chart_id": spec.chart_id, "format": fmt, "hash": digest,
+                     "filters": [str(v) for v in selection or []]}
+            old = previous.get(name)
+            if old and old.get("hash") == digest and os.path.exists(os.path.join(out_dir, name)):
+                files[name] = old
+                results.append({"file": name, "status": "skipped", "ms": 0.0,
+                                "bytes": old.get("bytes", 0)})
+                continue
+            jobs.append((name, entry, (spec.chart_id, raw, selection, fmt, dpi,
+                                       os.path.join(out_dir, name))))
+
+    started = time.perf_counter()
+    if jobs:
+        workers = min(len(jobs), workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(_export_job, *args): (name, entry) for name, entry, args in jobs}
+            for future in as_completed(futures):
+                name, entry = futures[future]
+                try:
+                    size, seconds = future.result()
+                except Exception as e:
+                    results.append({"file": name, "status": f"failed: {e}", "ms": 0.0, "bytes": 0})
+                    continue
+                files[name] = {**entry, "bytes": size, "ms": round(seconds * 1000, 1)}
+                results.append({"file": name, "status": "rendered", "ms": seconds * 1000,
+                                "bytes": size})
+
+    summary = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        "rendered": sum(r["status"] == "rendered" for r in results),
+        "skipped": sum(r["status"] == "skipped" for r in results),
+        "failed": sum(r["status"].startswith("failed") for r in results),
+    }
+    _write_manifest(out_dir, {**previous, **files}, summary)
+    return sorted(results, key=lambda r: r["file"]), summary
+
+
+def load_sheets(source):
+    """Sheets and fingerprints from a workbook, a .csv/.parquet fact table or a SQLite/DuckDB file"""
+    if source.lower().endswith(tuple(ENGINES_BY_SUFFIX)):
+        store = SQLSource(source)
+        try:
+            return store.load_all()
+        finally:
+            store.close()
+    if source.lower().endswith((".csv", ".parquet")):
+        data_sheets = load_fact_sheets(source)
+        return data_sheets, {sheet: data_fingerprint(df) for sheet, df in data_sheets.items()}
+    return load_workbook_with_fingerprints(source)
+
+
+def print_summary(results, summary):
+    print(f"{'file':<40}{'status':>12}{'ms':>10}{'KB':>10}")
+    for row in results:
+        print(f"{row['file']:<40}{row['status']:>12}{row['ms']:>10.0f}{row['bytes'] / 1024:>10.0f}")
+    rendered_ms = sum(row["ms"] for row in results)
+    print(f"\n{summary['rendered']} rendered, {summary['skipped']} skipped, "
+          f"{summary['failed']} failed in {summary['wall_ms'] / 1000:.1f} s "
+          f"(render time {rendered_ms / 1000:.1f} s across workers)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export analyses to PNG/SVG/PDF files")
+    parser.add_argument("--source", default="data.xlsx", help="workbook, a .csv/.parquet fact table or a .db/.duckdb database")
+    parser.add_argument("--out", default="exports", help="output directory")
+    parser.add_argument("--formats", default="png", help="comma-separated: png,svg,pdf")
+    parser.add_argument("--only", default="", help="comma-separated chart ids")
+    parser.add_argument("--filter", action="append", default=[],
+                        help="chart_id=value1,value2 (repeatable); default selects every value")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render even if inputs are unchanged")
+    args = parser.parse_args(argv)
+
+    formats = [value for value in args.formats.split(",") if value]
+    only = {value for value in args.only.split(",") if value}
+    try:
+        bad = [fmt for fmt in formats if fmt not in FORMATS] + [c for c in only if c not in SPECS_BY_ID]
+        if bad:
+            raise ValueError(f"Không hỗ trợ: {', '.join(bad)}")
+        filters = parse_filters(args.filter)
+        data_sheets, fingerprints = load_sheets(args.source)
+        results, summary = export_charts(
+            data_sheets, fingerprints, args.out, formats, only, filters,
+            dpi=args.dpi, workers=args.workers, force=args.force,
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print_summary(results, summary)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
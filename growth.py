@@ -0,0 +1,100 @@
+"""Tăng trưởng giữa các kỳ liên tiếp (YoY/QoQ/MoM) cho bất kỳ chiều nào.
+
+Thay cho các sheet tính sẵn (c4, c6, c8): từ một bảng gộp có cột kỳ (năm, quý
+hoặc tháng) và một cột giá trị, mỗi nhóm được ghép kỳ này với kỳ liền trước
+bằng một lượt so sánh mảng đã sắp xếp với chính nó dịch đi một dòng. Nhãn kỳ
+("2018-2019", "2019-Q4-2020-Q1", ...) chỉ được định dạng một lần cho mỗi kỳ
+khác nhau rồi gán theo mã, không nối chuỗi theo từng dòng.
+"""
+import numpy as np
+import pandas as pd
+
+from transforms import group_codes
+
+# Tần suất -> (các cột xác định kỳ, số kỳ trong một năm)
+FREQUENCIES = {
+    "YoY": (("YEAR",), 1),
+    "QoQ": (("YEAR", "QUARTER"), 4),
+    "MoM": (("YEAR", "MONTH"), 12),
+}
+
+
+def period_index(df, freq="YoY"):
+    """Integer index of each row's period; consecutive periods differ by one"""
+    columns, per_year = FREQUENCIES[freq]
+    index = df[columns[0]].to_numpy(dtype=np.int64) * per_year
+    if per_year > 1:
+        index = index + df[columns[1]].to_numpy(dtype=np.int64) - 1
+    return index
+
+
+def format_period(index, freq="YoY"):
+    """Text of one period index ("2019", "2019-Q4", "2019-12")"""
+    _, per_year = FREQUENCIES[freq]
+    year, offset = divmod(int(index), per_year)
+    if freq == "QoQ":
+        return f"{year}-Q{offset + 1}"
+    if freq == "MoM":
+        return f"{year}-{offset + 1:02d}"
+    return str(year)
+
+
+def pair_labels(first, second, sep="-", fmt=str):
+    """Labels "first<sep>second", formatted once per distinct pair
+
+    Returns a string array aligned with the inputs; the rows only gather
+    from the small table of distinct labels.
+    """
+    pairs = pd.MultiIndex.from_arrays([np.asarray(first), np.asarray(second)])
+    codes, uniques = pd.factorize(pairs)
+    text = np.array([f"{fmt(a)}{sep}{fmt(b)}" for a, b in uniques], dtype=object)
+    return pd.array(text[codes], dtype="str")
+
+
+def _growth_percent(first, second):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round((second - first) / first * 100, 2)
+
+
+def period_over_period(df, value, freq="YoY", by=(), label_sep="-"):
+    """Growth of ``value`` between consecutive periods within each group of ``by``
+
+    ``df`` holds one row per group and period (e.g. a cube rollup). Rows
+    are lexsorted by (group, period) once and compared with the row shifted
+    by one: a pair is kept only when both rows are in the same group and
+    the periods are adjacent, so a missing period yields no pair instead of
+    a jump. The result has the ``by`` columns, the period columns suffixed
+    ``_1``/``_2``, ``<value>_1``/``<value>_2``, ``GROWTH``,
+    ``GROWTHPERCENT`` and ``PERIOD_LABEL``, ordered by group then period.
+    """
+    by = list(by)
+    columns, _ = FREQUENCIES[freq]
+    index = period_index(df, freq)
+    codes = group_codes(df, by) if by else np.zeros(len(df), dtype=np.int64)
+
+    order = np.lexsort((index, codes))
+    sorted_index = index[order]
+    sorted_codes = codes[order]
+    adjacent = (
+        (sorted_codes[1:] == sorted_codes[:-1])
+        & (sorted_index[1:] - sorted_index[:-1] == 1)
+        & (sorted_codes[1:] >= 0)
+    )
+    first = order[:-1][adjacent]
+    second = order[1:][adjacent]
+
+    result = df[by].iloc[first].reset_index(drop=True)
+    for column in columns:
+        values = df[column].to_numpy()
+        result[f"{column}_1"] = values[first]
+        result[f"{column}_2"] = values[second]
+    values = df[value].to_numpy(dtype=np.float64)
+    result[f"{value}_1"] = values[first]
+    result[f"{value}_2"] = values[second]
+    result["GROWTH"] = values[second] - values[first]
+    result["GROWTHPERCENT"] = _growth_percent(values[first], values[second])
+    # Kỳ thứ hai luôn là kỳ đầu + 1 nên nhãn chỉ phụ thuộc vào kỳ đầu
+    result["PERIOD_LABEL"] = pair_labels(
+        index[first], index[first] + 1, label_sep, lambda i: format_period(i, freq)
+    )
+    return result
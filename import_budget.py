@@ -0,0 +1,99 @@
+"""Đo ngân sách thời gian import lúc khởi động của app.
+
+Những module app.py import ở đầu file phải nạp xong trước khi trang vẽ được
+tiêu đề và sidebar. Seaborn/matplotlib chỉ cần khi vẽ ảnh tĩnh (import trong
+hàm vẽ), còn engine Excel (openpyxl) chỉ cần khi cache dữ liệu bị miss (pandas
+tự import khi ``read_excel``), nên chúng không được có mặt trong nhóm đó.
+
+Mỗi phép đo chạy trong một interpreter mới::
+
+    python import_budget.py            # in bảng và trả mã 1 nếu vượt ngân sách
+"""
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+# Ngân sách (ms) cho các module app.py import trước lần vẽ đầu tiên (kể cả streamlit)
+FIRST_PAINT_BUDGET_MS = 1200
+# Các module không được nạp trước lần vẽ đầu tiên
+DEFERRED_MODULES = ("seaborn", "matplotlib", "openpyxl")
+# Chi phí thêm (ms) khi một trang cần tới chúng, chỉ để báo cáo
+ON_DEMAND = {
+    "plotting": ("matplotlib.figure", "matplotlib.backends.backend_agg", "seaborn"),
+    "excel": ("openpyxl",),
+}
+
+
+def app_imports(path="app.py"):
+    """Top-level modules imported by the app script"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def _probe(base, extra):
+    # Import base rồi đo riêng phần extra; trả về (ms, các module bị hoãn đã bị nạp)
+    code = (
+        "import sys, time\n"
+        f"for name in {list(base)!r}: __import__(name)\n"
+        "started = time.perf_counter()\n"
+        f"for name in {list(extra)!r}: __import__(name)\n"
+        "ms = (time.perf_counter() - started) * 1000\n"
+        f"loaded = [m for m in {list(DEFERRED_MODULES)!r} if m in sys.modules]\n"
+        "print(ms, ','.join(loaded))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def measure(repeat=3, path="app.py"):
+    """Median import times: first paint, then each on-demand group on top of it"""
+    first_paint = app_imports(path)
+    samples = [_probe([], first_paint) for _ in range(repeat)]
+    report = {
+        "first_paint": {
+            "modules": first_paint,
+            "ms": statistics.median(ms for ms, _ in samples),
+            "budget_ms": FIRST_PAINT_BUDGET_MS,
+            "eager_deferred": samples[-1][1],
+        },
+    }
+    for group, modules in ON_DEMAND.items():
+        report[group] = {
+            "modules": list(modules),
+            "ms": statistics.median(_probe(first_paint, modules)[0] for _ in range(repeat)),
+        }
+    return report
+
+
+def main():
+    report = measure()
+    first = report["first_paint"]
+    print(f"{'group':<14}{'ms':>10}{'budget':>10}  modules")
+    print(f"{'first paint':<14}{first['ms']:>10.0f}{first['budget_ms']:>10}  {', '.join(first['modules'])}")
+    for group in ON_DEMAND:
+        print(f"{'+ ' + group:<14}{report[group]['ms']:>10.0f}{'-':>10}  {', '.join(report[group]['modules'])}")
+
+    failed = False
+    if first["ms"] > first["budget_ms"]:
+        print(f"OVER BUDGET: first paint imports take {first['ms']:.0f} ms")
+        failed = True
+    if first["eager_deferred"]:
+        print(f"EAGER IMPORT: {', '.join(first['eager_deferred'])} loaded before first paint")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
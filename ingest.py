@@ -0,0 +1,197 @@
+"""Nạp bảng fact lớn (CSV/Parquet) theo từng chunk với bộ nhớ bị chặn.
+
+Mỗi chunk được ép kiểu gọn (số nguyên nhỏ, float32 cho số tiền), các cột chuỗi
+lặp lại được mã hoá thành mã số nguyên theo một từ điển chung, rồi gộp ngay vào
+các tổng tạm theo toàn bộ chiều của cube. Không giữ lại dòng thô nào, nên bộ
+nhớ đỉnh phụ thuộc vào kích thước cube chứ không phụ thuộc số dòng đầu vào.
+
+Chạy trực tiếp để đo tốc độ nạp::
+
+    python ingest.py sales.parquet
+"""
+import logging
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cube import (
+    DIMENSIONS, FACT_COLUMNS, MEASURES, STRING_DIMENSIONS, ProductIds, RollupCube, derive_sheets
+)
+
+logger = logging.getLogger("candy.data")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_CHUNK_ROWS = 500_000
+# Gộp các tổng tạm lại khi tổng số dòng của chúng vượt ngưỡng này
+COMPACT_ROWS = 1_000_000
+
+READ_DTYPES = {
+    "YEAR": "int16",
+    "MONTH": "int8",
+    "PRODUCTID": "int32",
+    "QUANTITY": "int32",
+    "SALESAMOUNT": "float32",
+}
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    cube_rows: int = 0
+    peak_rss_mb: float = None
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        peak = f"{self.peak_rss_mb:.1f} MB" if self.peak_rss_mb is not None else "n/a"
+        return (
+            f"{self.rows:,} rows in {self.chunks} chunks, {self.seconds:.2f}s "
+            f"({self.rows_per_sec:,.0f} rows/s), cube {self.cube_rows:,} rows, peak RSS {peak}"
+        )
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StreamingAggregator:
+    """Fold fact-table chunks into cube totals without keeping any rows"""
+
+    def __init__(self, compact_rows=COMPACT_ROWS):
+        self.compact_rows = compact_rows
+        self.rows = 0
+        self.chunks = 0
+        self._lookups = {column: {} for column in STRING_DIMENSIONS}
+        self._product_ids = ProductIds()
+        self._partials = []
+        self._partial_rows = 0
+
+    def _encode(self, column, values):
+        # Mã hoá theo từ điển chung cho mọi chunk; chỉ lặp Python trên các giá trị khác nhau
+        codes, uniques = pd.factorize(values)
+        lookup = self._lookups[column]
+        ids = np.fromiter(
+            (lookup.setdefault(value, len(lookup)) for value in uniques),
+            dtype=np.int32, count=len(uniques)
+        )
+        return np.where(codes >= 0, ids[codes] if len(ids) else codes, -1).astype(np.int32)
+
+    def add(self, chunk):
+        """Aggregate one chunk into the running totals"""
+        chunk = self._product_ids.assign(chunk)
+        keys = {}
+        for column in DIMENSIONS:
+            if column in STRING_DIMENSIONS:
+                keys[column] = self._encode(column, chunk[column])
+            else:
+                keys[column] = chunk[column].to_numpy()
+        frame = pd.DataFrame(keys)
+        # Cộng dồn bằng kiểu rộng để float32/int32 không tràn hay mất chính xác
+        frame["QUANTITY"] = chunk["QUANTITY"].to_numpy(dtype=np.int64)
+        frame["SALESAMOUNT"] = chunk["SALESAMOUNT"].to_numpy(dtype=np.float64)
+
+        partial = frame.groupby(DIMENSIONS, sort=False)[MEASURES].sum()
+        self._partials.append(partial)
+        self._partial_rows += len(partial)
+        self.rows += len(chunk)
+        self.chunks += 1
+        if self._partial_rows > self.compact_rows and len(self._partials) > 1:
+            self._compact()
+
+    def _compact(self):
+        combined = pd.concat(self._partials).groupby(level=DIMENSIONS, sort=False).sum()
+        self._partials = [combined]
+        self._partial_rows = len(combined)
+
+    def to_cube(self):
+        """Return the aggregated totals as a RollupCube with categorical dimensions"""
+        if not self._partials:
+            raise ValueError("Không có dữ liệu nào được nạp")
+        self._compact()
+        frame = self._partials[0].reset_index()
+        for column in STRING_DIMENSIONS:
+            categories = list(self._lookups[column])
+            # Đổi sang thứ tự đã sắp xếp để cube giống hệt cách gộp trong bộ nhớ
+            frame[column] = pd.Categorical.from_codes(
+                frame[column], categories=categories
+            ).reorder_categories(sorted(categories))
+        frame["YEAR"] = frame["YEAR"].astype(np.int64)
+        frame["MONTH"] = frame["MONTH"].astype(np.int64)
+        frame["PRODUCTID"] = frame["PRODUCTID"].astype(np.int64)
+        return RollupCube(frame.sort_values(DIMENSIONS, ignore_index=True))
+
+
+def iter_fact_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield DataFrame chunks of a CSV or Parquet fact table with compact dtypes"""
+    wanted = set(FACT_COLUMNS)
+    if path.endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        columns = [name for name in parquet.schema_arrow.names if name in wanted]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield _downcast(batch.to_pandas())
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {column: dtype for column, dtype in READ_DTYPES.items() if column in header}
+        reader = pd.read_csv(
+            path, usecols=lambda column: column in wanted, dtype=dtypes, chunksize=chunk_rows
+        )
+        with reader:
+            yield from reader
+
+
+def _downcast(chunk):
+    for column, dtype in READ_DTYPES.items():
+        if column in chunk.columns:
+            chunk[column] = chunk[column].astype(dtype)
+    return chunk
+
+
+def ingest_facts(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream a fact table into a RollupCube; returns (cube, IngestStats)"""
+    started = time.perf_counter()
+    aggregator = StreamingAggregator()
+    for chunk in iter_fact_chunks(path, chunk_rows):
+        aggregator.add(chunk)
+    cube = aggregator.to_cube()
+    stats = IngestStats(
+        rows=aggregator.rows,
+        chunks=aggregator.chunks,
+        seconds=time.perf_counter() - started,
+        cube_rows=len(cube),
+        peak_rss_mb=peak_rss_mb(),
+    )
+    return cube, stats
+
+
+def load_fact_sheets(path):
+    """Build the cube from a fact table file and derive every analysis sheet"""
+    cube, stats = ingest_facts(path)
+    # Tốc độ nạp và bộ nhớ đỉnh của lần nạp, kể cả khi chạy trong app
+    logger.info("Ingested %s: %s", path, stats)
+    return derive_sheets(cube)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python ingest.py <facts.csv|facts.parquet> [chunk_rows]")
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_ROWS
+    _, stats = ingest_facts(sys.argv[1], chunk_rows)
+    print(stats)
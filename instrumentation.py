@@ -0,0 +1,197 @@
+"""Đo thời gian từng giai đoạn của mỗi lần rerun (load, transform, render, ...).
+
+Bật bằng biến môi trường ``APP_PROFILING=1`` hoặc tham số URL ``?profile=1``.
+Khi tắt, ``stage()`` gần như không tốn gì. Khi bật, mỗi giai đoạn được ghi vào:
+
+* profile của lần rerun hiện tại (hiển thị trong panel chẩn đoán),
+* histogram dùng chung cho mọi session trong process (xuất dạng Prometheus),
+* một dòng log JSON cho mỗi lần rerun (logger ``candy.profiling``).
+
+Nếu đặt ``PROMETHEUS_TEXTFILE``, số liệu được ghi ra file đó sau mỗi rerun để
+node_exporter (textfile collector) thu thập.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger("candy.profiling")
+
+# Biên trên của các bucket histogram, tính bằng mili giây
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+# Các session rerun song song cùng ghi một file tạm rồi đổi tên: phải ghi lần lượt
+_textfile_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate quantile (upper bound of the bucket containing it)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Process-wide stage latency histograms and cache hit/miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = defaultdict(Histogram)
+        self.counters = defaultdict(int)
+
+    def observe(self, stage, chart_id, ms):
+        with self._lock:
+            self.histograms[(stage, chart_id or "")].observe(ms)
+
+    def count(self, cache, outcome, amount=1):
+        with self._lock:
+            self.counters[(cache, outcome)] += amount
+
+    def hit_rate(self, cache):
+        hits = self.counters.get((cache, "hit"), 0)
+        misses = self.counters.get((cache, "miss"), 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def summary_rows(self):
+        with self._lock:
+            return [
+                {
+                    "stage": stage,
+                    "chart": chart_id,
+                    "count": histogram.count,
+                    "mean_ms": histogram.total / histogram.count,
+                    "p50_ms": histogram.quantile(0.5),
+                    "p95_ms": histogram.quantile(0.95),
+                    "p99_ms": histogram.quantile(0.99),
+                }
+                for (stage, chart_id), histogram in sorted(self.histograms.items())
+            ]
+
+    def prometheus_text(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP candy_stage_latency_ms Latency of each app stage in milliseconds",
+            "# TYPE candy_stage_latency_ms histogram",
+        ]
+        with self._lock:
+            for (stage, chart_id), histogram in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",chart="{chart_id}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'candy_stage_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'candy_stage_latency_ms_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"candy_stage_latency_ms_sum{{{labels}}} {histogram.total:.3f}")
+                lines.append(f"candy_stage_latency_ms_count{{{labels}}} {histogram.count}")
+
+            lines.append("# HELP candy_cache_requests_total Cache lookups by outcome")
+            lines.append("# TYPE candy_cache_requests_total counter")
+            for (cache, outcome), value in sorted(self.counters.items()):
+                lines.append(f'candy_cache_requests_total{{cache="{cache}",outcome="{outcome}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class RunProfile:
+    """Stage timings of one script rerun"""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.stages = []
+        self.cache_events = []
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def profiling_requested(query_params=None):
+    """Whether profiling is turned on by environment or URL query parameter"""
+    if os.environ.get("APP_PROFILING", "").lower() in ("1", "true", "yes"):
+        return True
+    return bool(query_params) and query_params.get("profile") == "1"
+
+
+def start_run(enabled):
+    """Begin profiling a rerun and make it current for this thread"""
+    run = RunProfile(enabled)
+    _current_run.set(run)
+    return run
+
+
+def current_run():
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name, chart_id=None):
+    """Time a block as one stage of the current rerun (no-op when disabled)"""
+    run = _current_run.get()
+    if run is None or not run.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        run.stages.append((name, chart_id, ms))
+        METRICS.observe(name, chart_id, ms)
+
+
+def cache_event(cache, hit):
+    """Record a cache hit or miss for the current rerun"""
+    run = _current_run.get()
+    if run is None or not run.enabled:
+        return
+    outcome = "hit" if hit else "miss"
+    run.cache_events.append((cache, outcome))
+    METRICS.count(cache, outcome)
+
+
+def finish_run(run, **fields):
+    """Log the rerun as one JSON line and refresh the Prometheus text file"""
+    if run is None or not run.enabled:
+        return
+    record = {
+        "total_ms": round(run.total_ms, 2),
+        "stages": [{"stage": s, "chart": c, "ms": round(ms, 2)} for s, c, ms in run.stages],
+        "cache": run.cache_events,
+        **fields,
+    }
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+    path = os.environ.get("PROMETHEUS_TEXTFILE")
+    if path:
+        tmp = path + ".tmp"
+        with _textfile_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(METRICS.prometheus_text())
+            os.replace(tmp, path)
@@ -0,0 +1,487 @@
+"""Kiểm thử tải: nhiều session Streamlit đồng thời trên một process app.
+
+AppTest chạy script ngay trong process kiểm thử và không chạy được nhiều
+session song song (mỗi lần chạy thay runtime toàn cục), nên công cụ này khởi
+động ``streamlit run app.py`` headless rồi đóng vai N trình duyệt qua websocket
+của Streamlit. Mỗi session giữ giá trị widget như trình duyệt, lặp lại: nghỉ một
+khoảng ngẫu nhiên, thao tác như người dùng (đổi phân tích, bật/tắt năm / kênh /
+nhà sản xuất trong multiselect, mở/đóng bảng dữ liệu, đổi kiểu biểu đồ hoặc bộ
+dữ liệu) rồi yêu cầu rerun. Độ trễ rerun tính từ lúc gửi đến khi server báo
+script chạy xong.
+
+Các mức số session chạy lần lượt trên cùng một server (cache đã nóng sau mức
+đầu). Server bật APP_PROFILING và PROMETHEUS_TEXTFILE nên tỉ lệ hit cache lấy từ
+chính số liệu của app (độ trễ vì thế gồm cả panel chẩn đoán); RSS của process
+server đọc từ /proc (Linux). Client chạy cùng máy nên cũng chiếm một phần CPU::
+
+    python loadtest.py --sessions 1,5,10,20 --duration 60 --output load.json
+    python loadtest.py --sessions 1,5,10,20 --compare load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from bench import regressed, summarize
+
+# Nhãn các widget trong app.py mà session thao tác
+ANALYSIS_LABEL = "Chọn phân tích:"
+BACKEND_LABEL = "Kiểu biểu đồ:"
+DATASET_LABEL = "Bộ dữ liệu:"
+
+# Tần suất tương đối của từng loại thao tác (chỉ chọn trong các thao tác có thể làm trên trang)
+ACTION_WEIGHTS = {"analysis": 4, "filter": 3, "table": 2, "backend": 1, "dataset": 1}
+# Độ trễ một lượt rerun qua websocket nhiễu hơn các bước đo trong process của bench.py,
+# nên ngưỡng nhiễu tuyệt đối lớn hơn
+MIN_REGRESSION_MS = 5.0
+
+_COUNTER_LINE = re.compile(r'candy_cache_requests_total\{cache="([^"]+)",outcome="([^"]+)"\} (\d+)')
+
+
+def rss_mb(pid):
+    """Current resident set size of a process in MB (None if unavailable)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def cache_counters(path):
+    """{(cache, outcome): count} from the app's Prometheus text file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return {}
+    return {(cache, outcome): int(value) for cache, outcome, value in _COUNTER_LINE.findall(text)}
+
+
+def hit_rates(before, after):
+    """Hit rate of each cache between two counter snapshots"""
+    rates = {}
+    for cache in sorted({cache for cache, _ in after}):
+        hits = after.get((cache, "hit"), 0) - before.get((cache, "hit"), 0)
+        misses = after.get((cache, "miss"), 0) - before.get((cache, "miss"), 0)
+        rates[cache] = hits / (hits + misses) if hits + misses else None
+    return rates
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(script, port, metrics_path, timeout=60):
+    """Start ``streamlit run`` headless with profiling on; returns the process once healthy"""
+    env = dict(os.environ, APP_PROFILING="1", PROMETHEUS_TEXTFILE=metrics_path)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless=true",
+         f"--server.port={port}", "--browser.gatherUsageStats=false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server dừng với mã {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server không sẵn sàng sau {timeout} s")
+
+
+class Page:
+    """Widgets and errors of one script run, read from its deltas"""
+
+    def __init__(self, messages):
+        self.widgets = {}
+        self.expanders = []
+        self.exceptions = []
+        for msg in messages:
+            delta = msg.delta
+            if delta.WhichOneof("type") == "add_block":
+                block = delta.add_block
+                # Chỉ expander có key mới là widget (mở/đóng làm script chạy lại)
+                if block.WhichOneof("type") == "expandable" and block.expandable.id:
+                    self.expanders.append(block.expandable)
+                continue
+            element = delta.new_element
+            kind = element.WhichOneof("type")
+            if kind in ("selectbox", "multiselect", "radio"):
+                proto = getattr(element, kind)
+                self.widgets[proto.id] = (kind, proto)
+            elif kind == "exception":
+                self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+
+    def find(self, kind, label=None):
+        """Protos of the widgets of a kind (and label) on the page"""
+        return [proto for widget_kind, proto in self.widgets.values()
+                if widget_kind == kind and (label is None or proto.label == label)]
+
+    def defaults(self):
+        """Value of each widget as the browser would first show it"""
+        values = {}
+        for widget_id, (kind, proto) in self.widgets.items():
+            if kind == "multiselect":
+                values[widget_id] = list(proto.raw_values if proto.set_value else
+                                         [proto.options[i] for i in proto.default])
+            elif proto.set_value:
+                values[widget_id] = proto.raw_value
+            elif proto.HasField("default"):
+                values[widget_id] = proto.options[proto.default]
+        for expander in self.expanders:
+            values[expander.id] = expander.expanded
+        return values
+
+
+class Session:
+    """One simulated browser tab: widget values, a websocket and a random interaction sequence"""
+
+    def __init__(self, url, rng, query_string=""):
+        self.url = url
+        self.rng = rng
+        self.query_string = query_string
+        self.values = {}
+        self.page = None
+        self._cached_hashes = set()
+        self._ws = None
+
+    async def connect(self):
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    def _widget_states(self, back):
+        states = back.rerun_script.widget_states
+        for widget_id, value in self.values.items():
+            state = states.widgets.add()
+            state.id = widget_id
+            if isinstance(value, bool):
+                state.bool_value = value
+            elif isinstance(value, list):
+                state.string_array_value.data[:] = value
+            else:
+                state.string_value = value
+
+    async def rerun(self):
+        """Send the current widget values and wait for the run; returns (seconds, status)"""
+        back = BackMsg()
+        back.rerun_script.query_string = self.query_string
+        back.rerun_script.page_script_hash = ""
+        # Như trình duyệt: báo các message lớn đã có để server chỉ gửi tham chiếu
+        back.rerun_script.cached_message_hashes[:] = sorted(self._cached_hashes)
+        self._widget_states(back)
+
+        started = time.perf_counter()
+        await self._ws.send(back.SerializeToString())
+        messages = []
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self._ws.recv())
+            kind = msg.WhichOneof("type")
+            if msg.metadata.cacheable:
+                self._cached_hashes.add(msg.hash)
+            if kind == "delta":
+                messages.append(msg)
+            elif kind == "page_info_changed":
+                self.query_string = msg.page_info_changed.query_string
+            elif kind == "script_finished":
+                elapsed = time.perf_counter() - started
+                status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+                break
+
+        self.page = Page(messages)
+        # Widget không còn trên trang thì trình duyệt cũng bỏ giá trị của nó
+        values = self.page.defaults()
+        values.update((key, value) for key, value in self.values.items() if key in values)
+        self.values = values
+        return elapsed, status
+
+    def actions(self):
+        """Interactions possible on the current page"""
+        page = self.page
+        possible = []
+        if page.find("selectbox", ANALYSIS_LABEL):
+            possible.append("analysis")
+        if page.find("multiselect"):
+            possible.append("filter")
+        if page.expanders:
+            possible.append("table")
+        if page.find("radio", BACKEND_LABEL):
+            possible.append("backend")
+        if page.find("selectbox", DATASET_LABEL):
+            possible.append("dataset")
+        return possible
+
+    def interact(self):
+        """Change one widget like a user would; returns the action name"""
+        possible = self.actions()
+        action = self.rng.choices(possible, [ACTION_WEIGHTS[name] for name in possible])[0]
+        if action == "filter":
+            widget = self.rng.choice(self.page.find("multiselect"))
+            selected = self.values[widget.id]
+            option = self.rng.choice(list(widget.options))
+            # Bỏ chọn một giá trị (giữ lại ít nhất một) hoặc chọn lại giá trị đã bỏ
+            if option in selected and len(selected) > 1:
+                self.values[widget.id] = [value for value in selected if value != option]
+            elif option not in selected:
+                self.values[widget.id] = [value for value in widget.options
+                                          if value in selected or value == option]
+        elif action == "table":
+            expander = self.rng.choice(self.page.expanders)
+            self.values[expander.id] = not self.values[expander.id]
+        else:
+            kind, label = {
+                "analysis": ("selectbox", ANALYSIS_LABEL),
+                "backend": ("radio", BACKEND_LABEL),
+                "dataset": ("selectbox", DATASET_LABEL),
+            }[action]
+            widget = self.page.find(kind, label)[0]
+            others = [option for option in widget.options if option != self.values.get(widget.id)]
+            if others:
+                self.values[widget.id] = self.rng.choice(others)
+        return action
+
+
+class Recorder:
+    """Rerun samples of one load level"""
+
+    def __init__(self):
+        self.samples = []
+        self.errors = []
+
+    def add(self, action, elapsed, status, exceptions):
+        self.samples.append((action, elapsed))
+        if status != "FINISHED_SUCCESSFULLY":
+            self.errors.append(f"{action}: {status}")
+        self.errors.extend(f"{action}: {exception}" for exception in exceptions)
+
+
+async def run_session(url, rng, deadline, think, timeout, recorder):
+    """Drive one session until the deadline"""
+    session = Session(url, rng)
+    try:
+        await session.connect()
+        elapsed, status = await asyncio.wait_for(session.rerun(), timeout)
+        recorder.add("initial", elapsed, status, session.page.exceptions)
+        while True:
+            # Thời gian "suy nghĩ" giữa hai thao tác, phân phối mũ quanh giá trị trung bình
+            await asyncio.sleep(rng.expovariate(1 / think) if think > 0 else 0)
+            if time.monotonic() >= deadline:
+                break
+            action = session.interact()
+            elapsed, status = await asyncio.wait_for(session.rerun(), timeout)
+            recorder.add(action, elapsed, status, session.page.exceptions)
+    except (asyncio.TimeoutError, OSError, websockets.ConnectionClosed) as e:
+        recorder.errors.append(f"session: {type(e).__name__} {e}")
+    finally:
+        await session.close()
+
+
+async def sample_process(pid, started, level, recorder, timeline, interval, stop):
+    """Record the server's RSS and the reruns done so far every interval until stop is set"""
+    while not stop.is_set():
+        timeline.append({
+            "t": round(time.monotonic() - started, 2),
+            "sessions": level,
+            "rss_mb": rss_mb(pid) if pid else None,
+            "reruns": len(recorder.samples),
+        })
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(url, sessions, duration, think, timeout, seed, pid, metrics_path,
+                    started, timeline, interval):
+    """Run one load level; returns its results"""
+    recorder = Recorder()
+    counters_before = cache_counters(metrics_path)
+    rss_before = rss_mb(pid) if pid else None
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(
+        sample_process(pid, started, sessions, recorder, timeline, interval, stop)
+    )
+    level_started = time.monotonic()
+    deadline = level_started + duration
+    await asyncio.gather(*(
+        run_session(url, random.Random(seed * 1000 + number), deadline, think, timeout, recorder)
+        for number in range(sessions)
+    ))
+    elapsed = time.monotonic() - level_started
+    stop.set()
+    await sampler
+
+    rss_after = rss_mb(pid) if pid else None
+    by_action = {}
+    for action, seconds in recorder.samples:
+        by_action.setdefault(action, []).append(seconds)
+    # Lần tải trang đầu tiên tính riêng, không gộp vào độ trễ rerun
+    reruns = [seconds for action, seconds in recorder.samples if action != "initial"]
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "reruns": len(reruns),
+        "reruns_per_sec": len(reruns) / elapsed if elapsed else 0.0,
+        "latency": summarize(reruns),
+        "actions": {action: summarize(samples) for action, samples in sorted(by_action.items())},
+        "errors": len(recorder.errors),
+        "error_samples": recorder.errors[:10],
+        "hit_rates": hit_rates(counters_before, cache_counters(metrics_path)),
+        "rss_start_mb": rss_before,
+        "rss_end_mb": rss_after,
+        "rss_growth_mb": rss_after - rss_before if rss_before is not None and rss_after is not None
+        else None,
+    }
+
+
+def run(levels, duration, think=1.0, timeout=60.0, seed=0, url=None, pid=None,
+        metrics_path=None, script="app.py", interval=1.0):
+    """Run every load level against one server; returns a JSON-serializable dict"""
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        if url is None:
+            metrics_path = os.path.join(workdir, "metrics.prom")
+            port = _free_port()
+            process = start_server(script, port, metrics_path)
+            url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            pid = process.pid
+        try:
+            started = time.monotonic()
+            timeline = []
+            results = {
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "duration": duration,
+                    "think": think,
+                    "seed": seed,
+                },
+                "levels": {},
+                "timeline": timeline,
+            }
+            for sessions in levels:
+                entry = asyncio.run(run_level(
+                    url, sessions, duration, think, timeout, seed, pid,
+                    metrics_path or "", started, timeline, interval,
+                ))
+                results["levels"][str(sessions)] = entry
+                print(f"{sessions} sessions: {entry['reruns']} reruns, "
+                      f"p95 {entry['latency'].get('p95_ms', 0):.0f} ms", file=sys.stderr)
+            return results
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+
+def _mb(value):
+    return f"{value:.0f}" if value is not None else "n/a"
+
+
+def print_report(results):
+    print(f"{'sessions':>8}{'reruns':>8}{'rerun/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'errors':>8}{'RSS MB':>14}  cache hit rate")
+    for sessions, entry in results["levels"].items():
+        latency = entry["latency"]
+        rss = f"{_mb(entry['rss_start_mb'])}->{_mb(entry['rss_end_mb'])}"
+        rates = ", ".join(f"{cache} {rate:.0%}" for cache, rate in entry["hit_rates"].items()
+                          if rate is not None)
+        print(f"{sessions:>8}{entry['reruns']:>8}{entry['reruns_per_sec']:>9.2f}"
+              f"{latency.get('p50_ms', 0):>9.0f}{latency.get('p95_ms', 0):>9.0f}"
+              f"{latency.get('p99_ms', 0):>9.0f}{latency.get('max_ms', 0):>9.0f}"
+              f"{entry['errors']:>8}{rss:>14}  {rates}")
+    for sessions, entry in results["levels"].items():
+        cells = ", ".join(f"{action} {stats['p50_ms']:.0f}/{stats['p95_ms']:.0f}"
+                          for action, stats in entry["actions"].items() if stats["n"])
+        print(f"{sessions} sessions p50/p95 ms by action: {cells}")
+        for error in entry["error_samples"]:
+            print(f"  error: {error}")
+
+
+def compare(current, baseline, threshold):
+    """List (sessions, metric, baseline, current) that got worse than threshold allows"""
+    regressions = []
+    for sessions, entry in current["levels"].items():
+        old = baseline.get("levels", {}).get(sessions)
+        if not old or not old["reruns"] or not entry["reruns"]:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            before, after = old["latency"][key], entry["latency"][key]
+            if regressed(before, after, threshold, MIN_REGRESSION_MS):
+                regressions.append((sessions, key, before, after))
+        before, after = old["reruns_per_sec"], entry["reruns_per_sec"]
+        if before and after / before < 1 - threshold:
+            regressions.append((sessions, "reruns_per_sec", before, after))
+        if entry["errors"] > old["errors"]:
+            regressions.append((sessions, "errors", old["errors"], entry["errors"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent Streamlit sessions")
+    parser.add_argument("--sessions", default="1,5,10", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per level")
+    parser.add_argument("--think", type=float, default=1.0,
+                        help="mean pause between interactions of a session, in seconds")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds before a rerun fails")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the interaction sequences")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between RSS samples")
+    parser.add_argument("--script", default="app.py", help="app to start")
+    parser.add_argument("--url", help="websocket of an already running app instead of starting one"
+                                      " (ws://host:port/_stcore/stream)")
+    parser.add_argument("--pid", type=int, help="process id of that app, for RSS")
+    parser.add_argument("--metrics", help="its PROMETHEUS_TEXTFILE, for cache hit rates")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed change before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    levels = [int(value) for value in args.sessions.split(",") if value]
+    results = run(levels, args.duration, args.think, args.timeout, args.seed, args.url,
+                  args.pid, args.metrics, args.script, args.interval)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for sessions, metric, before, after in regressions:
+            print(f"REGRESSION {sessions} sessions {metric}: {before:.2f} -> {after:.2f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
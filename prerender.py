@@ -0,0 +1,122 @@
+"""Render trước mọi biểu đồ (với lựa chọn mặc định) song song trên nhiều process.
+
+Render Matplotlib tốn CPU và giữ GIL nên trong một process các biểu đồ vẫn
+được vẽ lần lượt. Ở đây mỗi phân tích được render trong một process con riêng
+(tất cả năm cho c2/c3, tất cả kênh cho c8, tất cả nhà sản xuất cho c10, ...) và
+ảnh PNG được đưa vào ``ChartCache`` dùng chung, với đúng key mà trang sẽ tra cứu.
+App chạy việc này khi lần đầu có session chọn backend ảnh tĩnh, nên các phân tích
+khác của backend đó không phải chờ render lạnh.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from chart_cache import DEFAULT_DPI, ChartCache, render_figure
+from charts import CHART_SPECS, SPECS_BY_ID, filter_index, load_plotting
+from transforms import selection_key
+
+logger = logging.getLogger("candy.prerender")
+
+# Số giây tối đa cho mỗi lượt biểu đồ của một worker; quá hạn thì bỏ qua các biểu đồ
+# còn lại và huỷ process con (có thể đang kẹt trên một khoá thừa hưởng lúc fork)
+RENDER_TIMEOUT = 120
+
+
+def _start_method():
+    # Với spawn hay forkserver, process con chạy lại app.py (Streamlit đặt nó làm
+    # __main__) thành __mp_main__, tức cả trang và việc nạp dữ liệu; fork thì không.
+    # Process con chỉ render rồi thoát, không đụng tới các thread của server.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return "fork"
+    return "spawn"
+
+
+def _init_worker():
+    # Process con fork thừa hưởng handler SIGTERM của Streamlit (chỉ báo server dừng),
+    # nên terminate() của Pool không giết được worker và server kẹt khi tắt.
+    # Ctrl+C do process cha xử lý (thoát khối with là terminate)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def default_selection(spec, data):
+    """Filter values selected by default on the page (every option)"""
+    return filter_index(data, spec.filter).options if spec.filter is not None else []
+
+
+def render_default(chart_id, raw, selection=None, fmt="png", dpi=DEFAULT_DPI):
+    """Transform, filter and render one analysis to bytes (default selection: every option)"""
+    spec = SPECS_BY_ID[chart_id]
+    data = spec.transform(raw) if spec.transform else raw
+    filtered = data
+    if spec.filter is not None:
+        index = filter_index(data, spec.filter)
+        filtered = index.select(index.options if selection is None else selection)
+    return render_figure(spec.draw(filtered), fmt=fmt, dpi=dpi)
+
+
+def _render_job(chart_id, raw):
+    started = time.perf_counter()
+    payload = render_default(chart_id, raw)
+    return payload, time.perf_counter() - started
+
+
+def prerender_all(data_sheets, fingerprints, cache, specs=CHART_SPECS, max_workers=None,
+                  timeout=RENDER_TIMEOUT):
+    """Render every analysis with its default selection into cache in parallel; returns the count"""
+    # Transform chạy ở đây để dựng key mặc định; biểu đồ đã có trong cache thì bỏ qua.
+    # Biểu đồ lỗi hay quá hạn chỉ được ghi log, worker kẹt bị huỷ khi thoát pool
+    jobs = {}
+    for spec in specs:
+        # Sheet không nạp được (đã được ghi log khi nạp) thì bỏ qua biểu đồ của nó
+        if spec.sheet not in data_sheets:
+            continue
+        raw = data_sheets[spec.sheet]
+        data = spec.transform(raw) if spec.transform else raw
+        key = ChartCache.make_key(
+            spec.chart_id, fingerprints.get(spec.sheet),
+            selection_key(default_selection(spec, data)), ("png", DEFAULT_DPI),
+        )
+        if key not in cache:
+            jobs[spec.chart_id] = (key, raw)
+    if not jobs:
+        return 0
+
+    started = time.perf_counter()
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    rendered = 0
+    method = _start_method()
+    if method == "fork":
+        # Import thư viện vẽ ở đây trước khi fork: nếu luồng script đang import
+        # matplotlib đúng lúc fork, process con thừa hưởng khoá import đang bị
+        # giữ và kẹt vĩnh viễn khi tự import lại
+        load_plotting()
+    context = multiprocessing.get_context(method)
+    # Pool (không phải ProcessPoolExecutor) vì terminate() huỷ được cả worker đang kẹt;
+    # thoát khối with là terminate
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        results = {
+            chart_id: (key, pool.apply_async(_render_job, (chart_id, raw)))
+            for chart_id, (key, raw) in jobs.items()
+        }
+        deadline = time.monotonic() + timeout * -(-len(jobs) // workers)
+        for chart_id, (key, result) in results.items():
+            try:
+                payload, seconds = result.get(max(0.0, deadline - time.monotonic()))
+            except multiprocessing.TimeoutError:
+                logger.error("Pre-render of %s timed out", chart_id)
+                continue
+            except Exception:
+                logger.exception("Pre-render of %s failed", chart_id)
+                continue
+            cache.put(key, payload)
+            rendered += 1
+            logger.debug("Pre-rendered %s in %.0f ms", chart_id, seconds * 1000)
+
+    logger.info(
+        "Pre-rendered %d/%d charts with %d workers in %.1f s",
+        rendered, len(jobs), workers, time.perf_counter() - started,
+    )
+    return rendered
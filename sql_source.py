@@ -0,0 +1,317 @@
+"""Nguồn dữ liệu SQL: tính c1–c14 trực tiếp trên bảng fact trong SQLite hoặc DuckDB.
+
+Mỗi rollup của cube trở thành một câu ``GROUP BY`` trên bảng fact, nên các
+sheet được dựng bằng đúng các hàm trong cube.py và giống hệt chế độ bảng fact
+CSV/Parquet, không cần bước xuất ra Excel. Bộ lọc của trang (năm, kênh, nhà sản
+xuất) được đẩy xuống mệnh đề ``WHERE`` thay vì lọc lại bằng pandas. Kết nối
+được dùng lại qua một pool, kết quả truy vấn được cache theo (câu lệnh, tham số).
+
+Tạo file SQLite từ một bảng fact::
+
+    python sql_source.py sales.parquet sales.db
+"""
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from cube import DIMENSIONS, FACT_COLUMNS, MEASURES, ProductIds, RollupCube, SHEET_BUILDERS, derive_sheet
+from data_loader import data_fingerprint, frames_nbytes
+
+logger = logging.getLogger("candy.data")
+
+try:
+    import duckdb
+except ImportError:  # DuckDB là tuỳ chọn, SQLite có sẵn trong Python
+    duckdb = None
+
+FACT_TABLE_NAME = "sales"
+ENGINES_BY_SUFFIX = {".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite", ".duckdb": "duckdb"}
+DEFAULT_POOL_SIZE = 4
+# Số kết quả truy vấn (theo câu lệnh + tham số) được giữ lại
+DEFAULT_CACHE_ENTRIES = 256
+# Các cột được đánh index khi tạo file SQLite: đều là cột của bộ lọc trên trang
+INDEXED_COLUMNS = ("YEAR", "DISTRIBUTION_CHANNEL", "MANUFACTURER")
+
+
+def engine_for(path):
+    """SQL engine ("sqlite" or "duckdb") of a database file, from its extension"""
+    engine = ENGINES_BY_SUFFIX.get(os.path.splitext(path)[1].lower())
+    if engine is None:
+        raise ValueError(f"Không nhận ra loại cơ sở dữ liệu: {path}")
+    return engine
+
+
+class ConnectionPool:
+    """At most ``size`` read-only connections, reused across queries and sessions"""
+
+    def __init__(self, connect, size=DEFAULT_POOL_SIZE):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, opening one only when none is idle"""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _sql_value(value):
+    # Giá trị numpy (vd. năm từ FilterIndex) -> kiểu Python mà driver SQL nhận được
+    return value.item() if hasattr(value, "item") else value
+
+
+class SQLCube(RollupCube):
+    """RollupCube whose rollups are GROUP BY queries on the fact table
+
+    ``filters`` maps dimension -> allowed values and is applied in the
+    WHERE clause of every query. Rows with a missing key are left out of
+    each rollup, as a pandas group-by would.
+    """
+
+    def __init__(self, source, filters=None):
+        self.source = source
+        self.filters = {column: list(values) for column, values in (filters or {}).items()}
+        unknown = [column for column in self.filters if column not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Không lọc được theo cột: {', '.join(unknown)}")
+        self.frame = None
+        self._rollups = {}
+
+    def _where(self, dims):
+        conditions = [f"{column} IS NOT NULL" for column in dims]
+        params = []
+        for column, values in sorted(self.filters.items()):
+            if not values:
+                conditions.append("1 = 0")
+                continue
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(_sql_value(value) for value in values)
+        return " AND ".join(conditions), tuple(params)
+
+    def _group_by(self, dims, aggregates):
+        dims = list(dims)
+        where, params = self._where(dims)
+        columns = ", ".join(dims)
+        sql = (
+            f"SELECT {columns}, {aggregates} FROM {self.source.table} "
+            f"WHERE {where} GROUP BY {columns} ORDER BY {columns}"
+        )
+        return self.source.query(sql, params)
+
+    def rollup(self, dims, measures=MEASURES):
+        """Sum measures over the given dimensions (one cached query per dimension set)"""
+        key = (tuple(dims), tuple(measures))
+        if key not in self._rollups:
+            self._rollups[key] = self._group_by(
+                dims, ", ".join(f"SUM({measure}) AS {measure}" for measure in measures)
+            )
+        return self._rollups[key]
+
+    def distinct_count(self, dims, column):
+        """Number of distinct values of column within each group of dims"""
+        key = (tuple(dims), ("nunique", column))
+        if key not in self._rollups:
+            self._rollups[key] = self._group_by(dims, f"COUNT(DISTINCT {column}) AS {column}")
+        return self._rollups[key]
+
+
+class SQLSource:
+    """Analysis sheets computed by SQL from a sales fact table
+
+    Offers the same interface as ``WorkbookStore`` (``sheet``, ``load_all``,
+    ``refresh``, ``sheets``, ``fingerprints``, ``generation``), and
+    ``sheet`` also takes filters that are pushed down into the queries.
+    Unfiltered sheets are kept in memory with their fingerprints;
+    filtered ones come from the query result cache.
+    """
+
+    def __init__(self, path, engine=None, table=FACT_TABLE_NAME, pool_size=DEFAULT_POOL_SIZE,
+                 cache_entries=DEFAULT_CACHE_ENTRIES):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.engine = engine or engine_for(path)
+        self.table = table
+        self.sheet_names = list(SHEET_BUILDERS)
+        self.sheets = {}
+        self.fingerprints = {}
+        self.generation = 0
+        self.cache_entries = cache_entries
+        self.hits = 0
+        self.misses = 0
+        self.failed = {}
+        self._results = OrderedDict()
+        self._stat = None
+        self._lock = threading.Lock()
+        self.pool = ConnectionPool(self._connector(), pool_size)
+
+    def _connector(self):
+        if self.engine == "duckdb":
+            if duckdb is None:
+                raise ImportError("Cần cài duckdb để đọc file .duckdb (pip install duckdb)")
+            database = duckdb.connect(self.path, read_only=True)
+            # Mỗi cursor là một kết nối riêng tới cùng database, dùng được từ thread khác
+            return database.cursor
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        return lambda: sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @property
+    def complete(self):
+        """Whether every unfiltered sheet is in memory"""
+        return len(self.sheets) == len(self.sheet_names)
+
+    @property
+    def nbytes(self):
+        """Memory held by the loaded sheets and the cached query results"""
+        with self._lock:
+            frames = list(self.sheets.values()) + list(self._results.values())
+        return frames_nbytes(frames)
+
+    def query(self, sql, params=()):
+        """Run a query through the pool; results are cached by (sql, params)"""
+        key = (sql, tuple(params))
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql, list(params))
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        result = pd.DataFrame.from_records(rows, columns=columns)
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.cache_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def sheet(self, name, filters=None):
+        """One analysis sheet; ``filters`` ({column: values}) narrow it in SQL"""
+        if name not in SHEET_BUILDERS:
+            raise KeyError(f"Không có sheet {name}")
+        if filters:
+            return derive_sheet(SQLCube(self, filters), name)
+        if name not in self.sheets:
+            df = derive_sheet(SQLCube(self), name)
+            with self._lock:
+                self.sheets = {**self.sheets, name: df}
+                self.fingerprints = {**self.fingerprints, name: data_fingerprint(df)}
+        return self.sheets[name]
+
+    def load_all(self):
+        """Compute every missing sheet; returns (sheets, fingerprints)
+
+        A sheet whose queries fail is logged, left out and kept in ``failed``.
+        """
+        # Một cube cho cả lượt để các sheet dùng chung rollup (vd. c2, c3, c5)
+        cube = SQLCube(self)
+        for name in self.sheet_names:
+            if name not in self.sheets:
+                try:
+                    df = derive_sheet(cube, name)
+                except Exception as e:
+                    logger.error("Không tính được sheet %s từ %s: %s", name, self.path, e)
+                    self.failed[name] = e
+                    continue
+                with self._lock:
+                    self.sheets = {**self.sheets, name: df}
+                    self.fingerprints = {**self.fingerprints, name: data_fingerprint(df)}
+                    self.failed.pop(name, None)
+        with self._lock:
+            return self.sheets, self.fingerprints
+
+    def _file_state(self):
+        # Với SQLite ở chế độ WAL, dữ liệu mới nằm trong file -wal trước khi checkpoint
+        state = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                state.append(None)
+                continue
+            state.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(state)
+
+    def refresh(self):
+        """Drop cached results if the database file changed; return the sheets whose content changed"""
+        state = self._file_state()
+        if state == self._stat:
+            return set()
+        with self._lock:
+            if self._stat is None:
+                self._stat = state
+                return set()
+            self._stat = state
+            self._results.clear()
+            loaded = list(self.sheets)
+
+        cube = SQLCube(self)
+        sheets = {name: derive_sheet(cube, name) for name in loaded}
+        fingerprints = {name: data_fingerprint(df) for name, df in sheets.items()}
+        changed = {name for name in loaded if fingerprints[name] != self.fingerprints.get(name)}
+        with self._lock:
+            self.sheets = {**self.sheets, **sheets}
+            self.fingerprints = {**self.fingerprints, **fingerprints}
+            if changed:
+                self.generation += 1
+        return changed
+
+    def close(self):
+        self.pool.close()
+
+
+def build_sqlite(facts_path, db_path, table=FACT_TABLE_NAME):
+    """Write a CSV/Parquet fact table into a SQLite file, with indexes on the filter columns
+
+    A missing PRODUCTID column is filled by ``ProductIds``, as in the
+    streaming ingest.
+    """
+    from ingest import iter_fact_chunks
+
+    rows = 0
+    product_ids = ProductIds()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        for chunk in iter_fact_chunks(facts_path):
+            chunk = product_ids.assign(chunk)
+            chunk[FACT_COLUMNS].to_sql(table, conn, if_exists="append", index=False)
+            rows += len(chunk)
+        for column in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column.lower()} ON {table} ({column})")
+    return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python sql_source.py <facts.csv|facts.parquet> <sales.db>")
+    started = time.perf_counter()
+    count = build_sqlite(sys.argv[1], sys.argv[2])
+    print(f"{count:,} rows written to {sys.argv[2]} in {time.perf_counter() - started:.1f} s")
@@ -0,0 +1,66 @@
+"""Sinh dữ liệu giả có cùng cấu trúc c1–c14 nhưng lớn hơn N lần, dùng cho benchmark.
+
+Sheet có cột chuỗi (kênh, nhà sản xuất, thương hiệu, ...) được nhân bản bằng
+cách thêm hậu tố vào các giá trị chuỗi, nên số nhóm tăng theo hệ số. Sheet chỉ
+có cột năm được kéo dài thêm các năm mới. Các cột đo lường được nhân với một
+hệ số ngẫu nhiên để dữ liệu không trùng lặp hoàn toàn.
+"""
+import numpy as np
+import pandas as pd
+
+YEAR_COLUMNS = ["YEAR", "YEAR1", "YEAR2", "YEAR_1", "YEAR_2"]
+MEASURE_COLUMNS = [
+    "SALESAMOUNT", "TOTALSALES", "TOTALPRODUCT", "SALES_YEAR1", "SALES_YEAR2",
+    "GROWTHSALES", "GROWTHPERCENT", "MAXSALESAMOUNT", "MINSALESAMOUNT",
+    "SALESAMOUNT_Y1", "SALESAMOUNT_Y2", "AVG_SALES_PER_PRODUCT",
+]
+
+
+def _string_columns(df):
+    return [column for column in df.columns if not pd.api.types.is_numeric_dtype(df[column])]
+
+
+def scale_sheet(df, factor, rng):
+    """Return df replicated ``factor`` times with distinct keys and jittered measures"""
+    if factor <= 1 or df.empty:
+        return df.copy()
+
+    strings = _string_columns(df)
+    years = [column for column in YEAR_COLUMNS if column in df.columns]
+    span = 0
+    if years:
+        span = int(df[years].max().max() - df[years].min().min()) + 1
+
+    copies = []
+    for i in range(factor):
+        copy = df.copy()
+        if i:
+            if strings:
+                for column in strings:
+                    copy[column] = copy[column].astype(str) + f" #{i}"
+            else:
+                for column in years:
+                    # Cột năm có thể đã được thu về int16: cộng trên int64 để không tràn
+                    copy[column] = copy[column].astype(np.int64) + i * span
+        for column in MEASURE_COLUMNS:
+            if column in copy.columns:
+                jitter = rng.uniform(0.8, 1.2, len(copy))
+                values = copy[column].to_numpy() * jitter
+                if pd.api.types.is_integer_dtype(copy[column]):
+                    values = np.round(values).astype(np.int64)
+                copy[column] = values
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_sheets(base_sheets, factor, seed=0):
+    """Scale every sheet of a workbook by the given factor"""
+    rng = np.random.default_rng(seed)
+    return {sheet: scale_sheet(df, factor, rng) for sheet, df in base_sheets.items()}
+
+
+def write_workbook(sheets, path):
+    """Write sheets to an xlsx file (used to benchmark cold loading)"""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet, index=False)
@@ -0,0 +1,80 @@
+"""Xem dữ liệu gốc theo trang: sắp xếp, tìm kiếm và phân trang chạy trên server.
+
+Thay vì gửi cả sheet qua ``st.dataframe``, chỉ cửa sổ đang xem (một trang) được
+serialize. Thứ tự sắp xếp theo từng cột và kết quả tìm kiếm gần đây được nhớ
+lại trên ``TableWindow``, nên đổi trang chỉ là một phép cắt mảng vị trí.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PAGE_SIZES = (25, 50, 100, 500)
+DEFAULT_PAGE_SIZE = 50
+# Số chuỗi tìm kiếm gần nhất được giữ lại kết quả
+MAX_SEARCHES = 16
+
+
+class TableWindow:
+    """Sort, search and page over a read-only frame, returning one window at a time
+
+    ``columns`` projects the frame once up front. Sort orders (one per
+    column and direction) and recent search masks are memoized; every
+    method is safe to call from several sessions at once.
+    """
+
+    def __init__(self, frame, columns=None):
+        self.frame = frame[list(columns)] if columns else frame
+        self._orders = {}
+        self._searches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def order(self, column, ascending=True):
+        """Row positions sorted by column (stable, missing values last)"""
+        key = (column, ascending)
+        with self._lock:
+            if key in self._orders:
+                return self._orders[key]
+        values = self.frame[[column]].reset_index(drop=True)
+        order = values.sort_values(
+            column, ascending=ascending, kind="stable", na_position="last"
+        ).index.to_numpy()
+        with self._lock:
+            self._orders[key] = order
+        return order
+
+    def matches(self, query):
+        """Boolean mask of rows where any column contains query (case-insensitive)"""
+        query = query.strip().lower()
+        with self._lock:
+            if query in self._searches:
+                self._searches.move_to_end(query)
+                return self._searches[query]
+        mask = np.zeros(len(self.frame), dtype=bool)
+        for column in self.frame.columns:
+            text = self.frame[column].astype(str).str.lower()
+            mask |= text.str.contains(query, regex=False, na=False).to_numpy()
+        with self._lock:
+            self._searches[query] = mask
+            while len(self._searches) > MAX_SEARCHES:
+                self._searches.popitem(last=False)
+        return mask
+
+    def count(self, query=""):
+        """Number of rows matching query"""
+        return int(self.matches(query).sum()) if query.strip() else len(self.frame)
+
+    def page(self, number, size, sort_by=None, ascending=True, query=""):
+        """Rows of page ``number`` (0-based) after searching and sorting"""
+        start = number * size
+        positions = self.order(sort_by, ascending) if sort_by else None
+        if query.strip():
+            mask = self.matches(query)
+            positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+        if positions is None:
+            # Không sắp xếp, không tìm kiếm: chỉ cắt một lát liên tiếp
+            return self.frame.iloc[start:start + size]
+        return self.frame.iloc[positions[start:start + size]]
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Các module nằm phẳng ở thư mục gốc của repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def facts():
+    """Small fact table with a gap year and rows missing some dimensions"""
+    rng = np.random.default_rng(0)
+    rows = 400
+    product = rng.integers(0, 12, rows)
+    df = pd.DataFrame({
+        "YEAR": rng.integers(2018, 2021, rows),
+        "MONTH": rng.integers(1, 13, rows),
+        "DISTRIBUTION_CHANNEL": rng.choice(["Online", "Store", "Kiosk"], rows).astype(object),
+        "MANUFACTURER": np.array(["M1", "M2", "M3"])[product % 3],
+        "BRAND": np.array(["B1", "B2", "B3", "B4"])[product % 4].astype(object),
+        "CATEGORY": np.array(["Candy", "Gum"])[product % 2].astype(object),
+        "PRODUCTID": product + 1,
+        "PRODUCTNAME": np.array([f"P{i}" for i in range(12)])[product],
+        "QUANTITY": rng.integers(1, 50, rows),
+        "SALESAMOUNT": rng.integers(100, 5000, rows).astype(float),
+    })
+    # Vài dòng thiếu thương hiệu / nhóm hàng / kênh: vẫn phải được tính vào các tổng khác
+    for column, start in (("BRAND", 0), ("CATEGORY", 7), ("DISTRIBUTION_CHANNEL", 13)):
+        df.loc[start::50, column] = None
+    # Kênh Kiosk không bán năm 2019: tăng trưởng của nó không được nối 2018 với 2020
+    return df[~((df["DISTRIBUTION_CHANNEL"] == "Kiosk") & (df["YEAR"] == 2019))].reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def expected_sheets(facts):
+    from cube import RollupCube, derive_sheets
+
+    return derive_sheets(RollupCube.from_facts(facts))
+
+
+def assert_same_sheets(expected, actual):
+    from cube import SHEET_BUILDERS
+
+    assert sorted(actual) == sorted(expected) == sorted(SHEET_BUILDERS)
+    for sheet, df in expected.items():
+        # Streaming ingest dùng float32 và SQL trả về chuỗi thường: so giá trị, không so dtype
+        pd.testing.assert_frame_equal(
+            actual[sheet].reset_index(drop=True), df.reset_index(drop=True),
+            check_dtype=False, check_categorical=False, obj=sheet,
+        )
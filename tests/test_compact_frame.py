@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from synthetic import scale_sheet
+from transforms import compact_frame
+
+
+def test_only_key_columns_are_downcast():
+    df = pd.DataFrame({
+        "YEAR": [2018, 2019, 2018, 2019],
+        "CHANNEL": ["A", "A", "B", "A"],
+        "TOTALSALES": [30_000, 20_000, 10_000, 5],
+    })
+    compact = compact_frame(df)
+    assert compact["YEAR"].dtype == "int16"
+    assert isinstance(compact["CHANNEL"].dtype, pd.CategoricalDtype)
+    assert compact["TOTALSALES"].dtype == "int64"
+    # Phép tính trên số đo không tràn như trên int16
+    assert (compact["TOTALSALES"] * 2).max() == 60_000
+
+
+def test_scaled_measures_do_not_overflow():
+    df = compact_frame(pd.DataFrame({"YEAR": [2018, 2019], "TOTALSALES": [32_000, 32_000]}))
+    scaled = scale_sheet(df, 3, np.random.default_rng(0))
+    assert (scaled["TOTALSALES"] > 0).all()
+    assert scaled["YEAR"].tolist() == [2018, 2019, 2020, 2021, 2022, 2023]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from cube import RollupCube, derive_sheets
+
+
+def fact_rows(**overrides):
+    row = {
+        "YEAR": 2018, "MONTH": 1, "DISTRIBUTION_CHANNEL": "Online", "MANUFACTURER": "M1",
+        "BRAND": "B1", "CATEGORY": "Candy", "PRODUCTID": 1, "PRODUCTNAME": "P1",
+        "QUANTITY": 1, "SALESAMOUNT": 10.0,
+    }
+    return {**row, **overrides}
+
+
+def test_row_with_a_missing_dimension_counts_in_other_rollups():
+    facts = pd.DataFrame([
+        fact_rows(),
+        fact_rows(BRAND=None, SALESAMOUNT=20.0),
+        fact_rows(MONTH=2, DISTRIBUTION_CHANNEL=np.nan, SALESAMOUNT=5.0),
+    ])
+    cube = RollupCube.from_facts(facts)
+    sheets = derive_sheets(cube)
+    assert sheets["c1"]["SALESAMOUNT"].tolist() == [35.0]
+    # Chỉ rollup theo chính chiều bị thiếu mới bỏ dòng đó
+    assert cube.rollup(["BRAND"])["SALESAMOUNT"].tolist() == [15.0]
+    assert cube.rollup(["DISTRIBUTION_CHANNEL"])["SALESAMOUNT"].tolist() == [30.0]
+    assert cube.rollup(["YEAR", "MONTH"])["SALESAMOUNT"].tolist() == [30.0, 5.0]
+
+
+def test_product_ids_follow_first_appearance_in_every_source(tmp_path, facts):
+    from ingest import load_fact_sheets
+    from sql_source import SQLSource, build_sqlite
+
+    # Tên xuất hiện lần đầu không theo thứ tự chữ cái: P7 trước P0
+    unnamed = facts.drop(columns="PRODUCTID").sort_values("PRODUCTNAME", ascending=False, kind="stable")
+    expected = {name: i + 1 for i, name in enumerate(unnamed["PRODUCTNAME"].unique())}
+    csv_path = tmp_path / "facts.csv"
+    unnamed.to_csv(csv_path, index=False)
+    build_sqlite(str(csv_path), str(tmp_path / "sales.db"))
+    store = SQLSource(str(tmp_path / "sales.db"))
+    try:
+        sources = {
+            "cube": derive_sheets(RollupCube.from_facts(unnamed)),
+            "ingest": load_fact_sheets(str(csv_path)),
+            "sql": store.load_all()[0],
+        }
+    finally:
+        store.close()
+    for name, sheets in sources.items():
+        c14 = sheets["c14"]
+        ids = dict(zip(c14["PRODUCTNAME"].astype(str), c14["PRODUCTID"]))
+        assert ids == {product: expected[product] for product in ids}, name
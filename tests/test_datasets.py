@@ -0,0 +1,42 @@
+import pytest
+
+from datasets import DatasetRegistry, dataset_paths
+from sql_source import build_sqlite
+
+
+@pytest.fixture
+def paths(tmp_path, facts):
+    facts_path = tmp_path / "facts.parquet"
+    facts.to_parquet(facts_path, index=False)
+    paths = {}
+    for name in ("north", "south"):
+        paths[name] = str(tmp_path / f"{name}.db")
+        build_sqlite(str(facts_path), paths[name])
+    return paths
+
+
+def test_duplicate_names_in_a_directory_raise(tmp_path):
+    for name in ("south.xlsx", "south.db", "north.db"):
+        (tmp_path / name).touch()
+    with pytest.raises(ValueError, match="south"):
+        dataset_paths(str(tmp_path))
+
+
+def test_evict_uses_measured_sizes_and_drops_derived_objects(paths):
+    registry = DatasetRegistry(paths, max_bytes=0)
+    registry.store("north").sheet("c1")
+    registry.derived("north").get_or_build(("transform", "c1", "fp"), lambda: "built")
+    registry.store("south").sheet("c1")
+    # Chưa đo thì chưa bỏ gì
+    assert registry.evict() == []
+    registry.measure("north")
+    registry.measure("south")
+    evicted = registry.evict()
+    assert len(evicted) == 1 and registry.loaded() == ["south"]
+    # Không tự mở lại bộ dữ liệu vừa bị bỏ ra; cache trả về không được dùng chung
+    assert len(registry.derived("north")) == 0
+    assert registry.loaded() == ["south"]
+    registry.store("north")
+    assert registry.loaded() == ["south", "north"]
+    for store in [registry.store(name) for name in registry.loaded()]:
+        store.close()
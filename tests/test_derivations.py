@@ -0,0 +1,29 @@
+import numpy as np
+
+from conftest import assert_same_sheets
+from ingest import load_fact_sheets
+
+
+def test_yearly_totals_match_the_fact_table(facts, expected_sheets):
+    # Đối chiếu với phép cộng trực tiếp trên bảng fact, không qua cube
+    totals = facts.groupby("YEAR")["SALESAMOUNT"].sum()
+    c1 = expected_sheets["c1"]
+    assert c1["YEAR"].tolist() == totals.index.tolist()
+    np.testing.assert_allclose(c1["SALESAMOUNT"], totals.to_numpy())
+
+
+def test_streaming_ingest_matches_cube(tmp_path, facts, expected_sheets):
+    path = tmp_path / "facts.csv"
+    facts.to_csv(path, index=False)
+    assert_same_sheets(expected_sheets, load_fact_sheets(str(path)))
+
+
+def test_growth_skips_the_missing_year(facts, expected_sheets):
+    growth = expected_sheets["c8"]
+    assert growth[growth["DISTRIBUTION_CHANNEL"] == "Kiosk"].empty
+    assert set(zip(growth["YEAR_1"], growth["YEAR_2"])) == {(2018, 2019), (2019, 2020)}
+    # Tăng trưởng theo kênh tính lại từ bảng fact, bỏ dòng thiếu kênh
+    online = facts[facts["DISTRIBUTION_CHANNEL"] == "Online"].groupby("YEAR")["SALESAMOUNT"].sum()
+    row = growth[(growth["DISTRIBUTION_CHANNEL"] == "Online") & (growth["YEAR_1"] == 2018)]
+    assert row["SALESAMOUNT_Y1"].item() == online[2018]
+    assert row["SALESAMOUNT_Y2"].item() == online[2019]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from transforms import FilterIndex
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    channel = rng.choice(["Online", "Store", "Kiosk", None], 300).astype(object)
+    return pd.DataFrame({
+        "CHANNEL": channel,
+        "YEAR": rng.integers(2018, 2023, 300),
+        "SALES": rng.normal(size=300),
+    })
+
+
+def expected(df, column, selection):
+    return df[df[column].isin(selection)]
+
+
+@pytest.mark.parametrize("dropna", [False, True])
+def test_select_equals_isin(frame, dropna):
+    index = FilterIndex(frame, "CHANNEL", dropna=dropna)
+    options = index.options
+    assert any(pd.isna(option) for option in options) is not dropna
+    for selection in ([], options[:1], options[1:], options[::2], options[::-1]):
+        pd.testing.assert_frame_equal(
+            index.select(selection), expected(frame, "CHANNEL", selection)
+        )
+
+
+def test_selecting_everything_returns_the_frame_itself(frame):
+    assert FilterIndex(frame, "YEAR").select(frame["YEAR"].unique()) is frame
+    # Có NaN bị bỏ thì chọn hết các giá trị vẫn phải loại các dòng NaN
+    index = FilterIndex(frame, "CHANNEL", dropna=True)
+    selected = index.select(index.options)
+    assert selected is not frame
+    pd.testing.assert_frame_equal(selected, frame[frame["CHANNEL"].notna()])
+
+
+def test_categorical_column_and_sorted_options():
+    df = pd.DataFrame({"C": pd.Categorical(["b", "a", "b", "c"]), "V": range(4)})
+    index = FilterIndex(df, "C", sort_options=True)
+    assert index.options == ["a", "b", "c"]
+    pd.testing.assert_frame_equal(index.select(["c", "b"]), expected(df, "C", ["c", "b"]))
+
+
+def test_unknown_values_select_nothing(frame):
+    index = FilterIndex(frame, "YEAR")
+    assert index.select([1900]).empty
+    assert index.rows([1900]).size == 0
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from growth import format_period, period_over_period
+
+
+def test_missing_period_yields_no_pair():
+    df = pd.DataFrame({
+        "CHANNEL": ["A", "A", "A", "A", "B", "B"],
+        "YEAR": [2018, 2019, 2021, 2022, 2020, 2019],
+        "SALES": [100.0, 110.0, 50.0, 75.0, 30.0, 20.0],
+    })
+    result = period_over_period(df, "SALES", "YoY", by=["CHANNEL"])
+    # A: 2019 -> 2021 thiếu 2020 nên không có cặp; B đã sắp lại theo năm
+    assert result["PERIOD_LABEL"].tolist() == ["2018-2019", "2021-2022", "2019-2020"]
+    assert result["CHANNEL"].tolist() == ["A", "A", "B"]
+    assert result["GROWTH"].tolist() == [10.0, 25.0, 10.0]
+    assert result["GROWTHPERCENT"].tolist() == [10.0, 50.0, 50.0]
+
+
+def test_quarters_pair_across_the_year_boundary():
+    df = pd.DataFrame({
+        "YEAR": [2019, 2019, 2020, 2020],
+        "QUARTER": [3, 4, 1, 3],
+        "SALES": [10.0, 20.0, 30.0, 40.0],
+    })
+    result = period_over_period(df, "SALES", "QoQ")
+    assert result["PERIOD_LABEL"].tolist() == ["2019-Q3-2019-Q4", "2019-Q4-2020-Q1"]
+    assert result["YEAR_1"].tolist() == [2019, 2019]
+    assert result["QUARTER_2"].tolist() == [4, 1]
+
+
+def test_months_and_zero_base():
+    df = pd.DataFrame({"YEAR": [2020, 2021], "MONTH": [12, 1], "SALES": [0.0, 5.0]})
+    result = period_over_period(df, "SALES", "MoM")
+    assert result["PERIOD_LABEL"].tolist() == ["2020-12-2021-01"]
+    assert np.isinf(result["GROWTHPERCENT"].iloc[0])
+    assert format_period(2020 * 12 + 11, "MoM") == "2020-12"
+
+
+def test_missing_group_keys_and_single_periods():
+    df = pd.DataFrame({
+        "CHANNEL": ["A", None, None, "C"],
+        "YEAR": [2018, 2018, 2019, 2018],
+        "SALES": [1.0, 2.0, 3.0, 4.0],
+    })
+    assert period_over_period(df, "SALES", "YoY", by=["CHANNEL"]).empty
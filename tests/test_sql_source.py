@@ -0,0 +1,35 @@
+import pandas as pd
+
+from conftest import assert_same_sheets
+from sql_source import SQLSource, build_sqlite
+
+
+def build_source(tmp_path, facts):
+    facts_path = tmp_path / "facts.parquet"
+    facts.to_parquet(facts_path, index=False)
+    db_path = str(tmp_path / "sales.db")
+    build_sqlite(str(facts_path), db_path)
+    return SQLSource(db_path)
+
+
+def test_sql_source_matches_cube(tmp_path, facts, expected_sheets):
+    store = build_source(tmp_path, facts)
+    try:
+        sheets, _ = store.load_all()
+    finally:
+        store.close()
+    assert not store.failed
+    assert_same_sheets(expected_sheets, sheets)
+
+
+def test_filters_are_pushed_into_the_query(tmp_path, facts, expected_sheets):
+    store = build_source(tmp_path, facts)
+    try:
+        c2 = store.sheet("c2", {"YEAR": [2019]})
+    finally:
+        store.close()
+    full = expected_sheets["c2"]
+    pd.testing.assert_frame_equal(
+        c2.reset_index(drop=True), full[full["YEAR"] == 2019].reset_index(drop=True),
+        check_dtype=False, check_categorical=False,
+    )
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from transforms import top_k_per_group
+
+
+def reference(df, by, value, k, largest=True):
+    # Cách làm cũ: sắp xếp toàn bộ rồi lấy k dòng đầu mỗi nhóm (NaN bị bỏ như nlargest)
+    ranked = df.dropna(subset=[*by, value]).sort_values(
+        value, ascending=not largest, kind="stable"
+    )
+    return ranked.groupby(by, sort=True).head(k).sort_values(
+        [*by, value], ascending=[True] * len(by) + [not largest], kind="stable"
+    )
+
+
+def test_k_greater_than_one_matches_sort_and_head():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "g": rng.integers(0, 5, 200),
+        "h": rng.choice(["a", "b"], 200),
+        "v": rng.normal(size=200),
+    })
+    for k in (1, 2, 3):
+        for largest in (True, False):
+            result = top_k_per_group(df, ["g", "h"], "v", k=k, largest=largest)
+            pd.testing.assert_frame_equal(result, reference(df, ["g", "h"], "v", k, largest))
+
+
+def test_ties_keep_every_row_equal_to_the_kth_value():
+    df = pd.DataFrame({"g": [1, 1, 1, 1, 2, 2], "v": [5.0, 3.0, 5.0, 1.0, 2.0, 2.0]})
+    assert top_k_per_group(df, ["g"], "v", k=1).index.tolist() == [0, 4]
+    assert top_k_per_group(df, ["g"], "v", k=1, ties=True).index.tolist() == [0, 2, 4, 5]
+    assert top_k_per_group(df, ["g"], "v", k=2, ties=True).index.tolist() == [0, 2, 4, 5]
+    assert top_k_per_group(df, ["g"], "v", k=3, ties=True).index.tolist() == [0, 2, 1, 4, 5]
+
+
+def test_nan_values_are_never_picked():
+    df = pd.DataFrame({"g": [1, 1, 2, 2, 2, 3], "v": [3.0, 1.0, np.nan, 5.0, np.nan, np.nan]})
+    for largest in (True, False):
+        result = top_k_per_group(df, ["g"], "v", k=2, largest=largest)
+        assert not result["v"].isna().any()
+        assert sorted(result.index) == [0, 1, 3]
+
+
+def test_nan_keys_are_dropped_and_totals_count_every_keyed_row():
+    df = pd.DataFrame({"g": ["a", "a", None, "b"], "v": [1.0, np.nan, 9.0, 2.0]})
+    result = top_k_per_group(df, ["g"], "v", k=1, total="TOTAL")
+    assert result.index.tolist() == [0, 3]
+    assert result["TOTAL"].tolist() == [1.0, 2.0]
+
+
+def test_no_valid_rows_returns_an_empty_frame():
+    df = pd.DataFrame({"g": [1, 2], "v": [np.nan, np.nan]})
+    result = top_k_per_group(df, ["g"], "v", k=1, total="TOTAL")
+    assert result.empty
+    assert list(result.columns) == ["g", "v", "TOTAL"]
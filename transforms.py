@@ -0,0 +1,145 @@
+"""Các phép biến đổi dữ liệu dùng chung, viết dạng vector hoá (không có lambda theo nhóm)."""
+import numpy as np
+import pandas as pd
+
+# Cột chuỗi được mã hoá categorical khi số giá trị khác nhau không quá tỉ lệ này
+CATEGORY_MAX_RATIO = 0.5
+# Cột khoá (năm, tháng, quý, mã sản phẩm) được thu về kiểu số nguyên nhỏ nhất. Cột đo
+# lường (số lượng, doanh số, ...) giữ int64 để phép tính sau đó không tràn số
+KEY_COLUMNS = frozenset({
+    "YEAR", "MONTH", "QUARTER", "YEAR1", "YEAR2", "YEAR_1", "YEAR_2", "PRODUCTID",
+})
+
+
+def compact_frame(df, max_category_ratio=CATEGORY_MAX_RATIO, key_columns=KEY_COLUMNS):
+    """Return df with repeated strings as sorted categoricals and integer keys in the smallest dtype"""
+    # Chỉ đổi không mất thông tin: danh mục được sắp xếp nên thứ tự sắp / gộp nhóm không đổi,
+    # số đo (số lượng, tiền) giữ int64/float64. Frame dùng chung giữa các session là chỉ đọc
+    # (pandas >= 3 luôn copy-on-write)
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_string_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            distinct = values.nunique()
+            if distinct <= max_category_ratio * len(values):
+                columns[column] = values.astype(
+                    pd.CategoricalDtype(np.sort(values.dropna().unique()))
+                )
+        elif column in key_columns and pd.api.types.is_integer_dtype(values) and len(values):
+            columns[column] = pd.to_numeric(values, downcast="integer")
+    return df.assign(**columns) if columns else df
+
+
+def plain_frame(df):
+    """Return df with categorical columns as plain strings (for the plotting code)"""
+    # seaborn xếp hue/x categorical theo danh mục và vẽ cả danh mục đã bị lọc bỏ;
+    # chuỗi thường giữ thứ tự xuất hiện của giá trị
+    columns = {
+        column: df[column].astype("str")
+        for column in df.columns
+        if isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**columns) if columns else df
+
+
+def group_codes(df, by):
+    """Dense integer code of each row's group (sorted by key), -1 for missing keys"""
+    codes = df.groupby(list(by), sort=True, observed=True).ngroup()
+    return codes.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def top_k_per_group(df, by, value, k=1, ties=False, total=None, largest=True):
+    """Return the k rows with the largest value (smallest if not largest) in each group of ``by``"""
+    # Sắp xếp một lần bằng lexsort, hạng trong nhóm suy ra từ vị trí đầu nhóm: không có
+    # callback Python theo nhóm. ties=True giữ mọi dòng bằng giá trị thứ k; total thêm tổng
+    # của nhóm. Dòng thiếu khoá hay giá trị không bao giờ được chọn (như nlargest) nhưng
+    # giá trị thiếu vẫn tính là 0 trong total
+    by = list(by)
+    all_codes = group_codes(df, by)
+    all_values = df[value].to_numpy(dtype=np.float64)
+    valid = np.flatnonzero((all_codes >= 0) & ~np.isnan(all_values))
+    if len(valid) == 0:
+        result = df.iloc[:0].copy()
+        if total is not None:
+            result[total] = pd.Series(dtype="float64")
+        return result
+
+    codes = all_codes[valid]
+    values = all_values[valid]
+
+    # lexsort: khoá cuối là khoá chính; -values để giá trị lớn đứng trước
+    order = np.lexsort((-values if largest else values, codes))
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    group_start = np.repeat(starts, sizes)
+    rank = np.arange(len(order)) - group_start
+
+    if ties:
+        # Giá trị thứ k của mỗi nhóm (hoặc giá trị cuối nếu nhóm có ít hơn k dòng)
+        kth = sorted_values[starts + np.minimum(k, sizes) - 1]
+        kth = np.repeat(kth, sizes)
+        keep = (rank < k) | (sorted_values >= kth if largest else sorted_values <= kth)
+    else:
+        keep = rank < k
+
+    picked = order[keep]
+    result = df.iloc[valid[picked]].copy()
+    if total is not None:
+        # Tổng theo mọi dòng có khoá của nhóm, kể cả dòng thiếu giá trị
+        keyed = all_codes >= 0
+        sums = np.bincount(all_codes[keyed], weights=np.nan_to_num(all_values[keyed]))
+        result[total] = sums[codes[picked]]
+    return result
+
+
+def selection_key(selection):
+    """Order-independent cache key of a multiselect selection, safe with NaN options"""
+    # NaN (float) lẫn với chuỗi thì sorted() lỗi; so sánh theo dạng chuỗi của giá trị
+    return tuple(sorted(map(str, selection)))
+
+
+class FilterIndex:
+    """Row index of one column for repeated multiselect filtering, equal to ``isin``"""
+
+    def __init__(self, df, column, dropna=False, sort_options=False):
+        self.frame = df
+        self.column = column
+        # Bỏ NaN thì NaN nhận mã -1 và không thuộc giá trị nào
+        codes, uniques = pd.factorize(df[column].to_numpy(), use_na_sentinel=dropna)
+        self.codes = codes
+        # Mỗi giá trị sở hữu một đoạn liên tục của positions (dòng sắp ổn định theo mã), nên lọc
+        # chỉ gom các đoạn được chọn rồi trả lại thứ tự dòng gốc, không quét lại cả cột
+        self.positions = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        ends = np.cumsum(counts) + np.count_nonzero(codes < 0)
+        self._spans = {
+            self._key(value): (end - count, end)
+            for value, count, end in zip(uniques, counts, ends)
+        }
+        self.options = sorted(uniques) if sort_options else list(uniques)
+        # Chọn hết mọi giá trị có bao phủ toàn bộ dòng không (sai khi có NaN bị bỏ)
+        self._covers_all = len(uniques) > 0 and counts.sum() == len(codes)
+
+    @staticmethod
+    def _key(value):
+        # NaN != NaN nên không dùng trực tiếp làm khoá dict
+        return None if pd.isna(value) else value
+
+    def rows(self, selection):
+        """Original row positions (ascending) of the rows matching selection"""
+        spans = {self._spans[key] for key in map(self._key, selection) if key in self._spans}
+        if not spans:
+            return np.empty(0, dtype=np.intp)
+        rows = np.concatenate([self.positions[start:end] for start, end in spans])
+        rows.sort()
+        return rows
+
+    def select(self, selection):
+        """Rows of the frame whose column value is in selection"""
+        selected = {key for key in map(self._key, selection) if key in self._spans}
+        if self._covers_all and len(selected) == len(self._spans):
+            return self.frame
+        return self.frame.iloc[self.rows(selected)]
@@ -0,0 +1,230 @@
+"""Backend vẽ phía trình duyệt: mỗi phân tích sinh một spec Vega-Lite gọn.
+
+Mỗi hàm nhận frame đã transform và trả về ``(data, spec)``: ``data`` chỉ gồm
+các cột mà biểu đồ cần, ``spec`` là dict Vega-Lite (không chứa dữ liệu). Với
+các phân tích có bộ lọc (năm, kênh, nhà sản xuất), việc chọn được làm ngay
+trên legend trong trình duyệt nên không cần chạy lại script trên server.
+"""
+
+PICK = "pick"
+
+
+def _legend_filter(field):
+    # Chọn (shift-click để chọn nhiều) trên legend; các nhóm khác bị làm mờ
+    return {
+        "params": [{"name": PICK, "select": {"type": "point", "fields": [field]}, "bind": "legend"}],
+        "opacity": {"condition": {"param": PICK, "value": 1}, "value": 0.1},
+    }
+
+
+def _line(title, x, y, color=None, x_type="ordinal", x_title=None, y_title=None, legend_title=None):
+    encoding = {
+        "x": {"field": x, "type": x_type, "title": x_title or x},
+        "y": {"field": y, "type": "quantitative", "title": y_title or y},
+        "tooltip": [{"field": x}, {"field": y, "format": ",.2f"}],
+    }
+    spec = {"title": title, "mark": {"type": "line", "point": True}}
+    if color:
+        interaction = _legend_filter(color)
+        encoding["color"] = {"field": color, "type": "nominal", "title": legend_title or color}
+        encoding["opacity"] = interaction["opacity"]
+        encoding["tooltip"].insert(0, {"field": color})
+        spec["params"] = interaction["params"]
+    spec["encoding"] = encoding
+    return spec
+
+
+def _grouped_bar(title, x, y, group, x_title=None, y_title=None, legend_title=None, tooltip=()):
+    return {
+        "title": title,
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": x, "type": "ordinal", "title": x_title or x},
+            "xOffset": {"field": group},
+            "y": {"field": y, "type": "quantitative", "title": y_title or y},
+            "color": {"field": group, "type": "nominal", "title": legend_title or group},
+            "tooltip": [{"field": x}, {"field": group}, *({"field": f} for f in tooltip),
+                        {"field": y, "format": ",.2f"}],
+        },
+    }
+
+
+def _bar_with_labels(title, x, y, label, color=None, x_title=None, y_title=None):
+    bar = {"mark": "bar", "encoding": {}}
+    if color is not None:
+        bar["encoding"]["color"] = color
+    text = {
+        "mark": {"type": "text", "angle": 270, "align": "left", "dx": 4, "fontWeight": "bold"},
+        "encoding": {"text": {"field": label}},
+    }
+    return {
+        "title": title,
+        "encoding": {
+            "x": {"field": x, "type": "ordinal", "title": x_title or x, "sort": None},
+            "y": {"field": y, "type": "quantitative", "title": y_title or y},
+            "tooltip": [{"field": x}, {"field": label}, {"field": y, "format": ",.2f"}],
+        },
+        "layer": [bar, text],
+    }
+
+
+def yearly_sales(df):
+    spec = _line("Doanh số theo từng năm", "YEAR", "SALESAMOUNT", x_title="Năm", y_title="Doanh số")
+    return df[["YEAR", "SALESAMOUNT"]], spec
+
+
+def monthly_volume(df):
+    spec = _line(
+        "Khối lượng bán theo từng tháng", "MONTH", "TOTALSALES", color="YEAR",
+        x_title="Tháng", y_title="Khối lượng bán", legend_title="Năm",
+    )
+    return df[["YEAR", "MONTH", "TOTALSALES"]], spec
+
+
+def quarterly_sales(df):
+    spec = _line(
+        "Doanh số theo từng quý", "QUARTER", "SALESAMOUNT", color="YEAR",
+        x_title="Quý", y_title="Doanh số", legend_title="Năm",
+    )
+    return df[["YEAR", "QUARTER", "SALESAMOUNT"]], spec
+
+
+def growth(df):
+    spec = {
+        "title": "Tăng trưởng doanh số theo năm (%)",
+        "encoding": {
+            "x": {"field": "YEAR_LABEL", "type": "ordinal", "title": "Giai đoạn", "sort": None},
+            "y": {"field": "GROWTHPERCENT", "type": "quantitative", "title": "Tăng trưởng (%)"},
+        },
+        "layer": [
+            {
+                "mark": "bar",
+                "encoding": {"color": {
+                    "condition": {"test": "datum.GROWTHPERCENT >= 0", "value": "green"},
+                    "value": "red",
+                }},
+            },
+            {
+                "mark": {"type": "text", "dy": -6},
+                "encoding": {"text": {"field": "GROWTHPERCENT", "format": ".2f"}},
+            },
+            {"mark": {"type": "rule", "color": "black"}, "encoding": {"y": {"datum": 0}}},
+        ],
+    }
+    return df[["YEAR_LABEL", "GROWTHPERCENT"]], spec
+
+
+def min_max_sales(df):
+    spec = {
+        "title": "MAX và MIN SALES AMOUNT theo năm và tháng",
+        "transform": [
+            {"fold": ["MAXSALESAMOUNT", "MINSALESAMOUNT"], "as": ["KIND", "VALUE"]},
+            {"calculate": "datum.KIND == 'MAXSALESAMOUNT' ? datum.MAXMONTH : datum.MINMONTH",
+             "as": "MONTH"},
+        ],
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "YEAR", "type": "ordinal", "title": "Năm"},
+            "xOffset": {"field": "KIND"},
+            "y": {"field": "VALUE", "type": "quantitative", "title": "Sales Amount"},
+            "color": {"field": "KIND", "type": "nominal", "title": None,
+                      "scale": {"range": ["orange", "gold"]}},
+            "tooltip": [{"field": "YEAR"}, {"field": "KIND"}, {"field": "MONTH", "title": "Tháng"},
+                        {"field": "VALUE", "format": ",.2f"}],
+        },
+    }
+    return df[["YEAR", "MAXMONTH", "MAXSALESAMOUNT", "MINMONTH", "MINSALESAMOUNT"]], spec
+
+
+def top_growth_product(df):
+    spec = _bar_with_labels(
+        "Top sản phẩm có tăng trưởng cao nhất từng năm", "YEAR_LABEL", "GROWTHSALES", "PRODUCTNAME",
+        color={"value": "mediumseagreen"}, x_title="Giai đoạn", y_title="Tăng trưởng (%)",
+    )
+    return df[["YEAR_LABEL", "GROWTHSALES", "PRODUCTNAME"]], spec
+
+
+def channel_sales(df):
+    spec = {
+        "title": "Doanh số và khối lượng bán theo từng Distribution Channel",
+        "transform": [{"fold": ["TOTALSALES", "SALESAMOUNT"], "as": ["MEASURE", "VALUE"]}],
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "DISTRIBUTION_CHANNEL", "type": "nominal", "title": "Kênh phân phối",
+                  "sort": None, "axis": {"labelAngle": -15}},
+            "xOffset": {"field": "MEASURE"},
+            "y": {"field": "VALUE", "type": "quantitative", "title": "Giá trị"},
+            "color": {"field": "MEASURE", "type": "nominal", "title": None,
+                      "scale": {"range": ["royalblue", "darkorange"]}},
+            "tooltip": [{"field": "DISTRIBUTION_CHANNEL"}, {"field": "MEASURE"},
+                        {"field": "VALUE", "format": ",.2f"}],
+        },
+    }
+    return df[["DISTRIBUTION_CHANNEL", "TOTALSALES", "SALESAMOUNT"]], spec
+
+
+def channel_growth(df):
+    spec = _line(
+        "Tăng trưởng doanh số theo từng kênh phân phối qua các năm", "YEAR_LABEL", "GROWTHPERCENT",
+        color="DISTRIBUTION_CHANNEL", x_title="Năm", y_title="Tăng trưởng (%)",
+        legend_title="Kênh phân phối",
+    )
+    return df[["YEAR_LABEL", "GROWTHPERCENT", "DISTRIBUTION_CHANNEL"]], spec
+
+
+def top_manufacturer(df):
+    spec = {
+        "title": "Nhà sản xuất có doanh số cao nhất từng năm",
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "YEAR", "type": "ordinal", "title": "Năm"},
+            "y": {"field": "SALESAMOUNT", "type": "quantitative", "title": "Doanh số"},
+            "color": {"field": "MANUFACTURER", "type": "nominal", "title": "MANUFACTURER"},
+            "tooltip": [{"field": "YEAR"}, {"field": "MANUFACTURER"},
+                        {"field": "SALESAMOUNT", "format": ",.2f"}],
+        },
+    }
+    return df[["YEAR", "MANUFACTURER", "SALESAMOUNT"]], spec
+
+
+def manufacturer_sales(df):
+    spec = _line(
+        "Sales Amount by Manufacturer (2018–2024)", "YEAR", "SALESAMOUNT", color="MANUFACTURER",
+        x_title="Year", y_title="Sales Amount", legend_title="Manufacturer",
+    )
+    return df[["YEAR", "MANUFACTURER", "SALESAMOUNT"]], spec
+
+
+def brand_by_channel(df):
+    spec = _bar_with_labels(
+        "Thương hiệu có hiệu suất doanh số trung bình mỗi sản phẩm tốt nhất trong từng kênh phân phối",
+        "DISTRIBUTION_CHANNEL", "AVG_SALES_PER_PRODUCT", "BRAND",
+        color={"field": "BRAND", "type": "nominal", "legend": None},
+        x_title="Distribution Channel", y_title="Average Sales per Product",
+    )
+    return df[["DISTRIBUTION_CHANNEL", "BRAND", "AVG_SALES_PER_PRODUCT"]], spec
+
+
+def category_sales(df):
+    spec = _line(
+        "Sales Amount by Product Category (2018–2024)", "YEAR", "SALESAMOUNT", color="CATEGORY",
+        x_title="Year", y_title="Sales Amount", legend_title="Category",
+    )
+    return df[["YEAR", "CATEGORY", "SALESAMOUNT"]], spec
+
+
+def top_brand_by_category(df):
+    spec = _grouped_bar(
+        "Top Selling Brand per Category per Year", "YEAR", "TOTALSALES", "CATEGORY",
+        x_title="Year", y_title="Total Sales", legend_title="Category", tooltip=("BRAND",),
+    )
+    return df[["YEAR", "CATEGORY", "BRAND", "TOTALSALES"]], spec
+
+
+def top_product_by_manufacturer(df):
+    spec = _grouped_bar(
+        "Doanh số theo năm và nhà sản xuất (với tên sản phẩm bán chạy nhất)",
+        "YEAR", "SALESAMOUNT", "MANUFACTURER",
+        x_title="Năm", y_title="Tổng doanh số", legend_title="Nhà sản xuất", tooltip=("PRODUCTNAME",),
+    )
+    return df[["YEAR", "MANUFACTURER", "PRODUCTNAME", "SALESAMOUNT"]], spec